@@ -1,15 +1,139 @@
+import os
+import threading
+import time
 from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Iterator, Optional, Union
 
 import streamlit as st
 
 from prompts import SYSTEM_PROMPT
-from scripts.summarize_news import QwenModel
+from scripts.backends import create_model
+from scripts.extractive import compress, summarize
+from scripts.metrics import (
+    configure_logging,
+    counter,
+    histogram,
+    log_event,
+    maybe_start_profiler,
+    observe_stream,
+    start_http_server,
+)
+from scripts.model_pool import ModelLease, ModelPool
+
+if TYPE_CHECKING:
+    from scripts.remote_model import RemoteModel
+    from scripts.summarize_news import QwenModel
+
+SUMMARY_CACHE_PATH = os.environ.get(
+    "SUMMARY_CACHE_PATH", "/app/data/cache/summaries.sqlite"
+)
+# URL of scripts/server.py, e.g. http://localhost:8000/v1
+INFERENCE_SERVER_URL = os.environ.get("INFERENCE_SERVER_URL")
+SERVER_OPTION = "Inference Server"
+MODELS_DIR = "/app/data/models"
+# Model pool limits and the model loaded at startup (file name in MODELS_DIR)
+MODEL_POOL_MAX_MB = float(os.environ.get("MODEL_POOL_MAX_MB", 8192))
+MODEL_POOL_MAX_MODELS = int(os.environ.get("MODEL_POOL_MAX_MODELS", 2))
+DEFAULT_MODEL = os.environ.get("DEFAULT_MODEL")
+# Seconds between UI refreshes while a summary is being generated
+FRAME_INTERVAL = 0.25
+# Port of the /metrics and /health endpoints (0 disables them)
+METRICS_PORT = int(os.environ.get("METRICS_PORT", 9100))
+
+SUMMARIES = counter("app_summaries_total", "Summaries requested", ["backend"])
+SUMMARY_SECONDS = histogram(
+    "app_summary_seconds", "Summary time in the app, cache hits included", ["backend"]
+)
+SUMMARY_TTFT = histogram(
+    "app_summary_ttft_seconds", "Time to the first streamed piece", ["backend"]
+)
+
+
+class GenerationJob:
+    """
+    Summary generated on a background thread tied to the browser session.
+    The script thread only reads snapshots, so reruns keep the partial result.
+    """
+
+    def __init__(
+        self,
+        start: Callable[[], Union[str, Iterator[str]]],
+        lease: Optional[ModelLease] = None,
+    ):
+        """
+        Initialize GenerationJob
+        Args:
+            start: callable returning the summary or a token iterator
+            lease: pool lease of the model, its lock held while generating and
+                released when the job ends
+        """
+        self.pieces = []
+        self.error = None
+        self.started = time.perf_counter()
+        self.finished = None
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, args=(start, lease), daemon=True
+        )
+        self._thread.start()
+
+    @property
+    def running(self) -> bool:
+        return self.finished is None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def text(self) -> str:
+        return "".join(self.pieces)
+
+    def cancel(self) -> None:
+        self._cancel.set()
+
+    def _run(
+        self,
+        start: Callable[[], Union[str, Iterator[str]]],
+        lease: Optional[ModelLease],
+    ) -> None:
+        try:
+            with lease.lock if lease else _NO_LOCK:
+                if self._cancel.is_set():
+                    return
+                response = start()
+                if isinstance(response, str):
+                    self.pieces.append(response)
+                    return
+                for token in response:
+                    if self._cancel.is_set():
+                        # Closing the generator stops decoding on the model
+                        getattr(response, "close", lambda: None)()
+                        break
+                    # list.append is atomic, the UI thread joins a snapshot
+                    self.pieces.append(token)
+        except Exception as e:
+            self.error = e
+        finally:
+            if lease is not None:
+                lease.release()
+            self.finished = time.perf_counter()
+
+
+class _NoLock:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_LOCK = _NoLock()
 
 
 def load_gguf_models():
     """Load available GGUF models from the models directory"""
 
-    models_dir = Path("/app/data/models")
+    models_dir = Path(MODELS_DIR)
     if not models_dir.exists():
         return []
 
@@ -17,29 +141,98 @@ def load_gguf_models():
     return [model.name for model in gguf_files]
 
 
-@st.cache_resource(show_spinner="🔄 Loading model…")
-def get_model(path: str):
-    return QwenModel(
-        model_path=path, enable_thinking=True, enable_few_shot_examples=False
+@st.cache_resource
+def start_monitoring():
+    """
+    Structured logs, metrics endpoint and optional profiler, once per process
+    """
+    configure_logging()
+    maybe_start_profiler()
+    if METRICS_PORT:
+        try:
+            return start_http_server(METRICS_PORT)
+        except OSError as e:
+            print(f"Metrics endpoint disabled: {e}")
+    return None
+
+
+@st.cache_resource(show_spinner="🔄 Connecting to server…")
+def get_remote_model(base_url: str):
+    return create_model("remote", base_url)
+
+
+def load_model(path: str):
+    return create_model(
+        "llama_cpp",
+        model_path=path,
+        enable_thinking=True,
+        enable_few_shot_examples=False,
+        cache_path=SUMMARY_CACHE_PATH,
+        use_mmap=True,
     )
 
 
-def summarize_text(text: str, model_name: str, llm: QwenModel | None):
+@st.cache_resource(show_spinner="🔄 Preparing model pool…")
+def get_model_pool() -> ModelPool:
     """
-    Stream summarize text using GGUF model or fallback to simple summarization
+    Models shared by all sessions, least recently used evicted over the limits
+    """
+    pool = ModelPool(
+        max_memory_mb=MODEL_POOL_MAX_MB,
+        max_models=MODEL_POOL_MAX_MODELS,
+        factory=load_model,
+    )
+    if DEFAULT_MODEL:
+        pool.preload(os.path.join(MODELS_DIR, DEFAULT_MODEL))
+    return pool
+
+
+def summarize_text(
+    text: str,
+    model_name: str,
+    llm: "QwenModel | RemoteModel | None",
+    long_mode: bool = False,
+    compress_tokens: Optional[int] = None,
+):
+    """
+    Stream summarize text using GGUF model or fallback to extractive summarization
     """
     if model_name != "Simple Fallback" and llm:
-        return llm.run(SYSTEM_PROMPT, text, stream=True)
+        backend = "remote" if model_name == SERVER_OPTION else "llama_cpp"
+        SUMMARIES.inc(backend=backend)
+        if compress_tokens:
+            # The remote backend has no tokenizer, characters approximate tokens
+            text = compress(text, compress_tokens, getattr(llm, "count_tokens", None))
+        if long_mode:
+            tokens = llm.run_long(SYSTEM_PROMPT, text, stream=True)
+        else:
+            tokens = llm.run(SYSTEM_PROMPT, text, stream=True)
+
+        def on_done(seconds: float, ttft: Optional[float], pieces: int) -> None:
+            SUMMARY_SECONDS.observe(seconds, backend=backend)
+            if ttft is not None:
+                SUMMARY_TTFT.observe(ttft, backend=backend)
+            log_event(
+                "app_summary",
+                backend=backend,
+                model=model_name,
+                long_mode=long_mode,
+                compress_tokens=compress_tokens,
+                chars=len(text),
+                pieces=pieces,
+                ttft_s=round(ttft, 3) if ttft is not None else None,
+                seconds=round(seconds, 3),
+            )
+
+        return observe_stream(tokens, on_done)
     else:
-        # Simple fallback summarization
+        SUMMARIES.inc(backend="fallback")
         words = text.split()
         if len(words) <= 50:
             return text
-        sentences = text.split(". ")
-        summary = ". ".join(sentences[:3])
-        if not summary.endswith("."):
-            summary += "."
-        return f"**Simple Fallback Summary:**\n{summary}"
+        sentences = summarize(text, n_sentences=3)
+        bullets = "\n".join(f"- {sentence}" for sentence in sentences)
+        return f"**Extractive Summary:**\n{bullets}"
 
 
 def main():
@@ -49,10 +242,14 @@ def main():
 
     st.title("📰 Financial News Summarizer")
     st.markdown("---")
+    start_monitoring()
 
     # Load available models
+    pool = get_model_pool()
     available_models = load_gguf_models()
     model_options = ["Simple Fallback"] + available_models
+    if INFERENCE_SERVER_URL:
+        model_options.insert(1, SERVER_OPTION)
 
     # Model selection
     col1, col2 = st.columns([2, 1])
@@ -72,12 +269,45 @@ def main():
             help="Select a GGUF model for summarization or use simple fallback",
         )
 
-        if selected_model != "Simple Fallback":
-            llm = get_model(f"/app/data/models/{selected_model}")
+        if selected_model == SERVER_OPTION:
+            llm = get_remote_model(INFERENCE_SERVER_URL)
+            st.success(f"✅ Using server model: {llm.model}")
+        elif selected_model != "Simple Fallback":
+            with st.spinner("🔄 Loading model…"):
+                llm = pool.get(os.path.join(MODELS_DIR, selected_model))
             st.success(f"✅ Model loaded: {selected_model}")
+            if llm.cache:
+                stats = llm.cache.stats()
+                st.caption(
+                    f"Summary cache: {stats['hits']} hits / {stats['misses']} misses, "
+                    f"{stats['entries']} stored"
+                )
         else:
             llm = None
-            st.info("ℹ️ Using simple text processing")
+            st.info("ℹ️ Using extractive summarization")
+
+        long_mode = st.checkbox(
+            "Long-document mode",
+            value=False,
+            disabled=llm is None,
+            help="Split articles that do not fit the context into chunks, "
+            "summarize them and merge the results (short articles are unaffected)",
+        )
+        compress_article = st.checkbox(
+            "Compress article",
+            value=False,
+            disabled=llm is None,
+            help="Drop boilerplate and keep the most informative sentences "
+            "before inference (faster prefill on long articles)",
+        )
+        compress_tokens = st.number_input(
+            "Token budget",
+            min_value=64,
+            max_value=8192,
+            value=512,
+            step=64,
+            disabled=not compress_article or llm is None,
+        )
 
         # Show available models
         if available_models:
@@ -87,25 +317,74 @@ def main():
         else:
             st.warning("⚠️ No GGUF models found in `/app/data/models/`")
 
+        loaded = pool.stats()
+        if loaded:
+            with st.expander("Loaded models"):
+                for entry in loaded:
+                    st.markdown(
+                        f"- `{entry['model']}`: loaded in {entry['load_s']:.1f}s, "
+                        f"+{entry['rss_mb']:.0f} MB RSS ({entry['file_mb']:.0f} MB file)"
+                    )
+
     # Summarize button
     if st.button("🚀 Summarize", type="primary", use_container_width=True):
         if article_text.strip():
-            with st.spinner("Processing text..."):
-                result_placeholder = st.empty()
-
-                response = summarize_text(article_text, selected_model, llm)
-
-                if isinstance(response, str):
-                    result_placeholder.markdown(response)
-                else:
-                    collected = ""
-                    for tok in response:
-                        collected += tok
-                        result_placeholder.markdown(collected)
+            previous = st.session_state.get("job")
+            if previous is not None:
+                previous.cancel()
 
+            lease = None
+            if llm is not None and selected_model != SERVER_OPTION:
+                # Model and lock of one pool entry, kept loaded until the job ends
+                lease = pool.acquire(os.path.join(MODELS_DIR, selected_model))
+                llm = lease.model
+            st.session_state["job"] = GenerationJob(
+                lambda: summarize_text(
+                    article_text,
+                    selected_model,
+                    llm,
+                    long_mode=long_mode,
+                    compress_tokens=compress_tokens if compress_article else None,
+                ),
+                lease=lease,
+            )
         else:
             st.error("⚠️ Please enter text for summarization!")
 
+    job = st.session_state.get("job")
+    if job is not None:
+        # Poll at a fixed frame rate only while generating
+        st.fragment(render_job, run_every=FRAME_INTERVAL if job.running else None)()
+
+
+def render_job():
+    """
+    Render a snapshot of the session's generation job
+    """
+    job = st.session_state.get("job")
+    if job is None:
+        return
+
+    if job.running:
+        col1, col2 = st.columns([4, 1])
+        elapsed = time.perf_counter() - job.started
+        col1.caption(f"⏳ Generating… {elapsed:.0f}s")
+        if col2.button("⏹ Cancel", use_container_width=True):
+            job.cancel()
+    elif job.cancelled:
+        st.caption("⏹ Cancelled")
+    else:
+        st.caption(f"✅ Done in {job.finished - job.started:.1f}s")
+
+    if job.error is not None:
+        st.error(f"⚠️ Generation failed: {job.error}")
+    st.markdown(job.text())
+
+    if not job.running and st.session_state.get("job_rendered_done") is not job:
+        # Full rerun once to stop the periodic refresh
+        st.session_state["job_rendered_done"] = job
+        st.rerun()
+
 
 if __name__ == "__main__":
     main()
@@ -73,3 +73,25 @@ Key Points:
 - Key Quote or Context: Better than expected iPhone unit sales provided investor confidence, despite a 15% YoY decline to approximately 40.4 million units sold.
 - Outlook/Next Steps: For Q4 fiscal 2016, Apple forecasts revenues between $45.5 billion and $47.5 billion and anticipates a gross margin of 37.5% to 38%.
 """
+
+CHUNK_PROMPT = """You are an elite financial analyst working for a top-tier news agency like Bloomberg or Reuters. You receive one part of a long financial news article or filing. Extract every critically important fact from this part so that it can later be merged with notes from the other parts.
+
+## Output Format (Strictly required)
+A plain list of short bullet points ("- ..."), one fact per bullet:
+- Companies with tickers, people with titles, organizations.
+- Financial metrics, market data, deal values with exact figures.
+- Dates, periods, forecasts and guidance.
+- Key quotes or stated reasons for the event.
+
+## Strict Rules and Constraints
+1. FACTS FROM THE SOURCE ONLY: Never add information that is not present in this part.
+2. PRECISION IN DETAILS: Reproduce names, figures, and dates with perfect accuracy.
+3. NO INTRODUCTIONS: Start directly with the first bullet. If the part holds no relevant facts, answer "- None".
+4. IMPORTANT: {think_mode}
+
+Article part:
+"""
+
+MERGE_PREFIX = """The article was too long to process at once. Below are the facts extracted from each of its parts, in order. Treat them as the full article.
+
+"""
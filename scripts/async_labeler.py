@@ -0,0 +1,217 @@
+import asyncio
+import random
+import time
+from typing import Iterable, Optional, Tuple
+
+import httpx
+from openai import (
+    APIConnectionError,
+    APIStatusError,
+    APITimeoutError,
+    AsyncOpenAI,
+    RateLimitError,
+)
+from tqdm import tqdm
+
+from prompts import SYSTEM_PROMPT
+from scripts.pipeline import JsonlCheckpoint
+
+RETRY_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """
+    Async token bucket rate limiter
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """
+        Initialize TokenBucket
+        Args:
+            rate: float, tokens added per second
+            capacity: float, burst size (one second worth of tokens by default)
+        """
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, tokens: float = 1.0) -> None:
+        """
+        Wait until tokens are available and take them
+        """
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self.updated) * self.rate
+                )
+                self.updated = now
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self.tokens) / self.rate)
+
+
+class AsyncLabeler:
+    """
+    Concurrent labelling client for any OpenAI-compatible endpoint
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str,
+        model: str,
+        system_prompt: str = SYSTEM_PROMPT,
+        max_concurrency: int = 8,
+        requests_per_minute: float = 60,
+        max_retries: int = 5,
+        backoff_base: float = 1.0,
+        backoff_max: float = 60.0,
+        timeout: float = 600.0,
+        extra_body: Optional[dict] = None,
+    ):
+        """
+        Initialize AsyncLabeler
+        Args:
+            base_url: str, OpenAI-compatible API url
+            api_key: str
+            model: str
+            max_concurrency: int, requests in flight at once (pooled connections)
+            requests_per_minute: float, token bucket refill rate
+            max_retries: int, retries on 429/5xx, connection errors and streams
+                broken mid-response (the whole request is repeated)
+        """
+        self.model = model
+        self.system_prompt = system_prompt
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.extra_body = {"reasoning": True} if extra_body is None else extra_body
+        self.bucket = TokenBucket(requests_per_minute / 60)
+
+        self.http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=max_concurrency,
+                max_keepalive_connections=max_concurrency,
+            ),
+            timeout=timeout,
+        )
+        # Retries are handled here so that they also go through the rate limiter
+        self.client = AsyncOpenAI(
+            base_url=base_url,
+            api_key=api_key,
+            http_client=self.http_client,
+            max_retries=0,
+        )
+
+    async def label(self, article: str) -> Tuple[str, str]:
+        """
+        Label one article, retrying with jittered exponential backoff
+        Args:
+            article: str
+        Returns:
+            tuple: (reasoning, answer)
+        """
+        attempt = 0
+        while True:
+            await self.bucket.acquire()
+            try:
+                return await self._label_once(article)
+            # httpx errors escape the client while the stream is being read
+            except (
+                APIConnectionError,
+                APITimeoutError,
+                APIStatusError,
+                httpx.TransportError,
+            ) as e:
+                status = getattr(e, "status_code", None)
+                retryable = status is None or status in RETRY_STATUS_CODES
+                if not retryable or attempt == self.max_retries:
+                    raise
+
+                delay = random.uniform(
+                    0, min(self.backoff_max, self.backoff_base * 2**attempt)
+                )
+                if isinstance(e, RateLimitError):
+                    retry_after = e.response.headers.get("retry-after")
+                    if retry_after and retry_after.replace(".", "", 1).isdigit():
+                        delay = max(delay, float(retry_after))
+                await asyncio.sleep(delay)
+                attempt += 1
+
+    async def _label_once(self, article: str) -> Tuple[str, str]:
+        """
+        Single streaming request, reasoning and content collected separately
+        """
+        stream = await self.client.chat.completions.create(
+            model=self.model,
+            stream=True,
+            extra_body=self.extra_body,
+            messages=[
+                {"role": "system", "content": self.system_prompt},
+                {"role": "user", "content": article},
+            ],
+        )
+        thinking, answer = [], []
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            d = chunk.choices[0].delta
+            thinking.append(
+                getattr(d, "reasoning_content", None)
+                or getattr(d, "reasoning", None)
+                or ""
+            )
+            answer.append(d.content or "")
+        return "".join(thinking), "".join(answer)
+
+    async def run(
+        self,
+        items: Iterable[Tuple[str, str]],
+        checkpoint: JsonlCheckpoint,
+        total: Optional[int] = None,
+    ) -> int:
+        """
+        Label articles concurrently and append results to the checkpoint
+        Args:
+            items: iterable of (key, article)
+            checkpoint: JsonlCheckpoint, receives reasoning and ground_truth columns
+            total: int, number of items for the progress bar
+        Returns:
+            int: number of failed items
+        """
+        slots = asyncio.Semaphore(self.max_concurrency)
+        progress = tqdm(total=total, desc="Labelling")
+        failed = 0
+
+        async def worker(key: str, article: str) -> None:
+            nonlocal failed
+            try:
+                reasoning, answer = await self.label(article)
+                checkpoint.append(key, {"reasoning": reasoning, "ground_truth": answer})
+            except Exception as e:
+                failed += 1
+                print(f"Error labelling {key}: {e}")
+            finally:
+                progress.update(1)
+                slots.release()
+
+        tasks = set()
+        try:
+            for key, article in items:
+                # Bounded in-flight window, items are read lazily
+                await slots.acquire()
+                task = asyncio.create_task(worker(key, article))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        finally:
+            progress.close()
+            await self.http_client.aclose()
+
+        return failed
@@ -0,0 +1,42 @@
+import importlib
+from typing import Any, Dict
+
+# Backend name -> "module:ClassName", imported on first use only
+BACKENDS: Dict[str, str] = {
+    "llama_cpp": "scripts.summarize_news:QwenModel",
+    "remote": "scripts.remote_model:RemoteModel",
+}
+
+_loaded: Dict[str, type] = {}
+
+
+def register_backend(name: str, target: str) -> None:
+    """
+    Register a summarizer backend
+    Args:
+        name: str
+        target: str, "module:ClassName" with run(system_prompt, article, stream)
+    """
+    BACKENDS[name] = target
+    _loaded.pop(name, None)
+
+
+def load_backend(name: str) -> type:
+    """
+    Import a backend class lazily
+    """
+    if name not in _loaded:
+        if name not in BACKENDS:
+            raise ValueError(
+                f"Unknown backend {name!r}, available: {', '.join(BACKENDS)}"
+            )
+        module_name, class_name = BACKENDS[name].split(":")
+        _loaded[name] = getattr(importlib.import_module(module_name), class_name)
+    return _loaded[name]
+
+
+def create_model(name: str, *args: Any, **kwargs: Any) -> Any:
+    """
+    Instantiate a backend, importing its heavy dependencies only now
+    """
+    return load_backend(name)(*args, **kwargs)
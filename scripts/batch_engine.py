@@ -0,0 +1,252 @@
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple
+
+from tqdm import tqdm
+
+from prompts import SYSTEM_PROMPT
+
+# Seconds without results before worker processes are checked
+LIVENESS_INTERVAL = 5
+
+
+def default_split(n_workers: int, n_threads: Optional[int] = None) -> int:
+    """
+    Threads per worker for a given number of workers
+    Args:
+        n_workers: int
+        n_threads: int, total threads to share (all CPUs by default)
+    Returns:
+        int: threads per worker
+    """
+    n_threads = n_threads or os.cpu_count() or 1
+    return max(1, n_threads // max(1, n_workers))
+
+
+def _worker_main(
+    worker_id: int,
+    model_kwargs: Dict[str, Any],
+    system_prompt: str,
+    long_mode: bool,
+    structured: bool,
+    compress_tokens: Optional[int],
+    task_queue: "mp.Queue",
+    result_queue: "mp.Queue",
+) -> None:
+    """
+    Worker process: own QwenModel, summarize articles until a None task arrives
+    """
+    # Imported here so the parent process never loads llama.cpp
+    from scripts.extractive import compress
+    from scripts.summarize_news import QwenModel
+
+    llm = QwenModel(**model_kwargs)
+    result_queue.put(("ready", worker_id, None, None))
+
+    while True:
+        task = task_queue.get()
+        if task is None:
+            break
+        seq, article = task
+        # Lets the parent fail this item if the process dies on it
+        result_queue.put(("start", worker_id, seq, None))
+        try:
+            if compress_tokens:
+                article = compress(article, compress_tokens, llm.count_tokens)
+            if long_mode:
+                summary = llm.run_long(system_prompt, article, stream=False)
+            elif structured:
+                summary = llm.run_structured(system_prompt, article).to_text()
+            else:
+                summary = llm.run(system_prompt, article, stream=False)
+            result_queue.put(("done", worker_id, seq, summary))
+        except Exception as e:
+            result_queue.put(("error", worker_id, seq, str(e)))
+
+
+class BatchSummarizer:
+    """
+    Pool of QwenModel worker processes fed from a work queue
+    """
+
+    def __init__(
+        self,
+        model_path: str,
+        n_workers: int = 4,
+        threads_per_worker: Optional[int] = None,
+        system_prompt: str = SYSTEM_PROMPT,
+        enable_thinking: bool = False,
+        enable_few_shot_examples: bool = False,
+        n_ctx: int = 16000,
+        cache_path: Optional[str] = None,
+        long_mode: bool = False,
+        draft: Optional[str] = None,
+        structured: bool = False,
+        compress_tokens: Optional[int] = None,
+    ):
+        """
+        Initialize BatchSummarizer
+        Args:
+            model_path: str, path to GGUF model
+            n_workers: int, number of processes, each owning its own Llama
+            threads_per_worker: int, n_threads of every context (cpu_count / n_workers by default)
+            system_prompt: str, unformatted system prompt
+            cache_path: str, SQLite summary cache shared by all workers
+            long_mode: bool, map-reduce articles that do not fit n_ctx
+            draft: str, speculative decoding draft of every worker (see QwenModel);
+                each worker then keeps an n_ctx x vocab logits buffer
+            structured: bool, grammar-constrained summaries without think blocks
+            compress_tokens: int, extractive pre-filter budget of every article (see extractive.compress)
+        """
+        self.n_workers = n_workers
+        self.threads_per_worker = threads_per_worker or default_split(n_workers)
+        self.system_prompt = system_prompt
+        self.long_mode = long_mode
+        self.structured = structured
+        self.compress_tokens = compress_tokens
+        self.model_kwargs = {
+            "model_path": model_path,
+            "enable_thinking": enable_thinking,
+            "enable_few_shot_examples": enable_few_shot_examples,
+            "n_ctx": n_ctx,
+            "n_threads": self.threads_per_worker,
+            "cache_path": cache_path,
+            "draft": draft,
+        }
+
+    def run(
+        self, items: Iterable[Tuple[Hashable, str]], total: Optional[int] = None
+    ) -> Iterator[Tuple[Hashable, Optional[str]]]:
+        """
+        Summarize articles in parallel and yield results in input order
+        Args:
+            items: iterable of (key, article)
+            total: int, number of items for the progress bar
+        Returns:
+            Iterator[tuple]: (key, summary), summary is None if the worker failed
+        """
+        ctx = mp.get_context("spawn")
+        # Bounded so that the feeder never reads far ahead of the workers
+        task_queue = ctx.Queue(maxsize=self.n_workers * 2)
+        result_queue = ctx.Queue()
+
+        workers = [
+            ctx.Process(
+                target=_worker_main,
+                args=(
+                    worker_id,
+                    self.model_kwargs,
+                    self.system_prompt,
+                    self.long_mode,
+                    self.structured,
+                    self.compress_tokens,
+                    task_queue,
+                    result_queue,
+                ),
+                daemon=True,
+            )
+            for worker_id in range(self.n_workers)
+        ]
+        for worker in workers:
+            worker.start()
+
+        keys: Dict[int, Hashable] = {}
+        feed_errors: List[BaseException] = []
+
+        def feed():
+            n_items = 0
+            try:
+                for seq, (key, article) in enumerate(items):
+                    keys[seq] = key
+                    task_queue.put((seq, article))
+                    n_items = seq + 1
+            except BaseException as e:
+                feed_errors.append(e)
+            finally:
+                # Always sent, otherwise the result loop would wait forever
+                result_queue.put(("fed", None, n_items, None))
+                for _ in workers:
+                    task_queue.put(None)
+
+        feeder = threading.Thread(target=feed, daemon=True)
+        feeder.start()
+
+        pending: Dict[int, Optional[str]] = {}
+        # worker_id -> item being summarized
+        in_flight: Dict[int, int] = {}
+        per_worker: Counter = Counter()
+        n_items = None
+        next_seq = 0
+        ready = 0
+        started = None
+        progress = tqdm(total=total, desc="Summarizing")
+
+        try:
+            while n_items is None or next_seq < n_items:
+                try:
+                    message = result_queue.get(timeout=LIVENESS_INTERVAL)
+                except queue.Empty:
+                    message = None
+                if message is None:
+                    message = self._reap(workers, in_flight)
+                    if message is None:
+                        continue
+                kind, worker_id, seq, payload = message
+
+                if kind == "fed":
+                    if feed_errors:
+                        raise feed_errors[0]
+                    n_items = seq
+                    continue
+                if kind == "ready":
+                    ready += 1
+                    if ready == self.n_workers:
+                        started = time.perf_counter()
+                    continue
+                if kind == "start":
+                    in_flight[worker_id] = seq
+                    continue
+
+                in_flight.pop(worker_id, None)
+                if kind == "error":
+                    print(f"Worker {worker_id} failed on item {keys[seq]}: {payload}")
+                    payload = None
+                pending[seq] = payload
+                per_worker[worker_id] += 1
+                progress.update(1)
+
+                if started is not None:
+                    hours = max(time.perf_counter() - started, 1e-9) / 3600
+                    progress.set_postfix(
+                        {f"w{w}": f"{n / hours:.0f}/h" for w, n in per_worker.items()}
+                    )
+
+                while next_seq in pending:
+                    yield keys.pop(next_seq), pending.pop(next_seq)
+                    next_seq += 1
+        finally:
+            progress.close()
+            feeder.join(timeout=1)
+            for worker in workers:
+                worker.join(timeout=5)
+                if worker.is_alive():
+                    worker.terminate()
+
+    @staticmethod
+    def _reap(workers: List[Any], in_flight: Dict[int, int]) -> Optional[tuple]:
+        """
+        Result message for an item whose worker process died, if any
+        Raises:
+            RuntimeError: if no worker is alive
+        """
+        for worker_id, worker in enumerate(workers):
+            if not worker.is_alive() and worker_id in in_flight:
+                seq = in_flight.pop(worker_id)
+                return "error", worker_id, seq, f"exit code {worker.exitcode}"
+        if not any(worker.is_alive() for worker in workers):
+            raise RuntimeError("All batch workers exited")
+        return None
@@ -0,0 +1,327 @@
+import argparse
+import itertools
+import json
+import multiprocessing as mp
+import os
+import platform
+import queue
+import resource
+import statistics
+import time
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from prompts import SYSTEM_PROMPT
+
+
+def percentile(values: List[float], q: float) -> float:
+    """
+    Linear-interpolated percentile, q in [0, 100]
+    """
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    pos = (len(values) - 1) * q / 100
+    low = int(pos)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (pos - low)
+
+
+def peak_rss_mb() -> float:
+    """
+    Peak resident memory of the current process in MB
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux
+    return peak / (1024 * 1024) if platform.system() == "Darwin" else peak / 1024
+
+
+def load_sample(dataset_path: str, n_articles: int, seed: int = 0) -> List[str]:
+    """
+    Fixed sample of articles so that runs are comparable
+    """
+    if os.path.isdir(dataset_path):
+        from scripts.dataset_store import DatasetStore
+
+        df = DatasetStore(dataset_path).read(["article"])
+    else:
+        df = pd.read_csv(dataset_path, usecols=["article"])
+    n_articles = min(n_articles, len(df))
+    return df["article"].sample(n=n_articles, random_state=seed).tolist()
+
+
+def measure_article(llm, system_prompt: str, article: str) -> Dict[str, float]:
+    """
+    Stream one summary and time prefill and decode
+    """
+    prompt_tokens = llm.count_tokens(article)
+    start = time.perf_counter()
+    first = None
+    pieces = []
+    for token in llm.run_stream(system_prompt, article, speculative=True):
+        if first is None:
+            first = time.perf_counter()
+        pieces.append(token)
+    end = time.perf_counter()
+
+    first = first or end
+    generated_tokens = llm.count_tokens("".join(pieces)) if pieces else 0
+    ttft = first - start
+    decode_time = end - first
+    return {
+        "prompt_tokens": prompt_tokens,
+        "generated_tokens": generated_tokens,
+        "ttft_s": ttft,
+        "prefill_tps": prompt_tokens / ttft if ttft > 0 else 0.0,
+        "decode_tps": (
+            (generated_tokens - 1) / decode_time
+            if generated_tokens > 1 and decode_time > 0
+            else 0.0
+        ),
+        "latency_s": end - start,
+        "acceptance_rate": llm.speculative_stats().get("acceptance_rate"),
+    }
+
+
+def run_config(
+    config: Dict[str, Any],
+    model_path: str,
+    articles: List[str],
+    max_tokens: Optional[int],
+    system_prompt: str = SYSTEM_PROMPT,
+) -> Dict[str, Any]:
+    """
+    Benchmark one configuration (meant to run in a fresh process for clean RSS)
+    """
+    from scripts.summarize_news import QwenModel
+
+    start = time.perf_counter()
+    llm = QwenModel(
+        model_path=model_path,
+        enable_thinking=config["thinking"],
+        enable_few_shot_examples=config["few_shot"],
+        n_ctx=config["n_ctx"],
+        n_threads=config["n_threads"],
+        n_batch=config["n_batch"],
+        draft=config.get("draft"),
+    )
+    if max_tokens:
+        llm.generation_kwargs["max_tokens"] = max_tokens
+    load_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    llm.warm_prefix(system_prompt)
+    warm_prefix_s = time.perf_counter() - start
+
+    rows = [measure_article(llm, system_prompt, article) for article in articles]
+    latencies = [row["latency_s"] for row in rows]
+
+    return {
+        **config,
+        "n_articles": len(rows),
+        "load_s": load_s,
+        "warm_prefix_s": warm_prefix_s,
+        "ttft_s_mean": statistics.fmean(row["ttft_s"] for row in rows),
+        "prefill_tps_mean": statistics.fmean(row["prefill_tps"] for row in rows),
+        "decode_tps_mean": statistics.fmean(row["decode_tps"] for row in rows),
+        "latency_s_p50": percentile(latencies, 50),
+        "latency_s_p90": percentile(latencies, 90),
+        "latency_s_p99": percentile(latencies, 99),
+        "generated_tokens_mean": statistics.fmean(
+            row["generated_tokens"] for row in rows
+        ),
+        "peak_rss_mb": peak_rss_mb(),
+        **(
+            {"acceptance_rate": llm.speculative_stats(total=True)["acceptance_rate"]}
+            if llm.draft
+            else {}
+        ),
+        "articles": rows,
+    }
+
+
+def _run_config_process(result_queue: "mp.Queue", *args) -> None:
+    try:
+        result_queue.put(run_config(*args))
+    except Exception as e:
+        result_queue.put({"error": str(e)})
+
+
+def sweep(
+    model_path: str,
+    articles: List[str],
+    n_threads: List[int],
+    n_ctx: List[int],
+    n_batch: List[int],
+    thinking: List[bool],
+    few_shot: List[bool],
+    max_tokens: Optional[int] = None,
+    draft: Optional[List[Optional[str]]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Run every configuration of the grid in its own process
+    Returns:
+        list: one result per configuration
+    """
+    ctx = mp.get_context("spawn")
+    results = []
+    grid = list(
+        itertools.product(
+            n_threads, n_ctx, n_batch, thinking, few_shot, draft or [None]
+        )
+    )
+    for i, (threads, ctx_size, batch, think, shots, drafter) in enumerate(
+        grid, start=1
+    ):
+        config = {
+            "n_threads": threads,
+            "n_ctx": ctx_size,
+            "n_batch": batch,
+            "thinking": think,
+            "few_shot": shots,
+            "draft": drafter,
+        }
+        print(f"[{i}/{len(grid)}] {config}")
+
+        result_queue = ctx.Queue()
+        process = ctx.Process(
+            target=_run_config_process,
+            args=(result_queue, config, model_path, articles, max_tokens),
+        )
+        process.start()
+        while True:
+            try:
+                result = result_queue.get(timeout=5)
+                break
+            except queue.Empty:
+                if not process.is_alive():
+                    result = {"error": f"process exited with {process.exitcode}"}
+                    break
+        process.join()
+
+        if "error" in result:
+            print(f"  failed: {result['error']}")
+            result = {**config, **result}
+        else:
+            print(
+                f"  ttft {result['ttft_s_mean']:.2f}s, "
+                f"prefill {result['prefill_tps_mean']:.1f} tok/s, "
+                f"decode {result['decode_tps_mean']:.1f} tok/s, "
+                f"p50 {result['latency_s_p50']:.1f}s, "
+                f"rss {result['peak_rss_mb']:.0f} MB"
+                + (
+                    f", accepted {result['acceptance_rate']:.0%}"
+                    if "acceptance_rate" in result
+                    else ""
+                )
+            )
+        results.append(result)
+    return results
+
+
+def compare(
+    results: List[Dict[str, Any]], baseline_path: str, tolerance: float = 0.1
+) -> List[str]:
+    """
+    Regressions against a previous results file (same configuration keys)
+    Args:
+        results: list of current results
+        baseline_path: str, JSONL written by a previous run
+        tolerance: float, allowed relative slowdown
+    Returns:
+        list: human-readable regressions
+    """
+    keys = ("n_threads", "n_ctx", "n_batch", "thinking", "few_shot", "draft")
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {
+            tuple(row.get(k) for k in keys): row
+            for row in map(json.loads, f)
+            if "error" not in row
+        }
+
+    regressions = []
+    for row in results:
+        old = baseline.get(tuple(row.get(k) for k in keys))
+        if old is None or "error" in row:
+            continue
+        # (metric, higher is better)
+        for metric, higher in (
+            ("prefill_tps_mean", True),
+            ("decode_tps_mean", True),
+            ("ttft_s_mean", False),
+            ("latency_s_p50", False),
+            ("peak_rss_mb", False),
+        ):
+            change = (row[metric] - old[metric]) / old[metric] if old[metric] else 0.0
+            if (higher and change < -tolerance) or (not higher and change > tolerance):
+                regressions.append(
+                    f"{dict(zip(keys, (row.get(k) for k in keys)))} {metric}: "
+                    f"{old[metric]:.2f} -> {row[metric]:.2f} ({change:+.0%})"
+                )
+    return regressions
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(v) for v in value.split(",")]
+
+
+def _draft_list(value: str) -> List[Optional[str]]:
+    return [
+        None if v.strip().lower() == "none" else v.strip() for v in value.split(",")
+    ]
+
+
+def _bool_list(value: str) -> List[bool]:
+    return [v.strip().lower() in ("1", "true", "on", "yes") for v in value.split(",")]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark QwenModel inference")
+    parser.add_argument("--model-path", default="/app/data/models/Qwen3-1.7B-Q8_0.gguf")
+    parser.add_argument("--dataset-path", default="data/dataset/clean_dataset.csv")
+    parser.add_argument("--n-articles", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--n-threads", type=_int_list, default=[8])
+    parser.add_argument("--n-ctx", type=_int_list, default=[16000])
+    parser.add_argument("--n-batch", type=_int_list, default=[512])
+    parser.add_argument("--thinking", type=_bool_list, default=[False])
+    parser.add_argument("--few-shot", type=_bool_list, default=[False])
+    parser.add_argument(
+        "--draft",
+        type=_draft_list,
+        default=[None],
+        help='speculative drafts to compare, e.g. "none,prompt_lookup,<draft.gguf>"',
+    )
+    parser.add_argument(
+        "--max-tokens", type=int, default=None, help="cap generation (e.g. tiny models)"
+    )
+    parser.add_argument("--output", default="bench_results.jsonl")
+    parser.add_argument("--baseline", default=None, help="previous results to compare")
+    parser.add_argument("--tolerance", type=float, default=0.1)
+    args = parser.parse_args()
+
+    articles = load_sample(args.dataset_path, args.n_articles, args.seed)
+    results = sweep(
+        args.model_path,
+        articles,
+        args.n_threads,
+        args.n_ctx,
+        args.n_batch,
+        args.thinking,
+        args.few_shot,
+        max_tokens=args.max_tokens,
+        draft=args.draft,
+    )
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        for row in results:
+            f.write(json.dumps({"model_path": args.model_path, **row}) + "\n")
+    print(f"Saved {len(results)} results to {args.output}")
+
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            raise SystemExit(1)
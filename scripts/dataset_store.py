@@ -0,0 +1,265 @@
+import argparse
+import glob
+import os
+from typing import Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from scripts.news_index import content_digest
+
+ID_COLUMN = "article_id"
+# CSV columns stored as model outputs rather than article fields
+PREDICTION_PREFIXES = ("prediction", "ground_truth", "reasoning")
+
+
+def article_id(text: str) -> str:
+    """
+    Stable article key: digest of the whitespace-normalized text
+    """
+    return content_digest(text).hex()
+
+
+class DatasetStore:
+    """
+    Columnar store of articles and model outputs keyed by article_id:
+
+        <root>/articles/part-00000.parquet   article_id + article fields
+        <root>/predictions/<name>.parquet    article_id + <name>, one file per model
+
+    Adding a prediction column writes one small file and never touches the articles.
+    """
+
+    def __init__(self, root: str = "data/store"):
+        """
+        Initialize DatasetStore
+        Args:
+            root: str, store directory (created on first write)
+        """
+        self.root = root
+        self.articles_dir = os.path.join(root, "articles")
+        self.predictions_dir = os.path.join(root, "predictions")
+
+    def article_parts(self) -> List[str]:
+        return sorted(glob.glob(os.path.join(self.articles_dir, "part-*.parquet")))
+
+    def prediction_names(self) -> List[str]:
+        return sorted(
+            os.path.basename(path)[: -len(".parquet")]
+            for path in glob.glob(os.path.join(self.predictions_dir, "*.parquet"))
+        )
+
+    def article_columns(self) -> List[str]:
+        """
+        Article fields of all parts (parts imported from different CSVs may differ)
+        """
+        columns: Dict[str, None] = {}
+        for path in self.article_parts():
+            columns.update(dict.fromkeys(pq.read_schema(path).names))
+        return list(columns)
+
+    def columns(self) -> List[str]:
+        return self.article_columns() + self.prediction_names()
+
+    def ids(self) -> Set[str]:
+        """
+        IDs of stored articles (reads only the ID column)
+        """
+        return set(self._read_articles([ID_COLUMN])[ID_COLUMN].to_pylist())
+
+    def append_articles(self, df: pd.DataFrame, text_column: str = "article") -> int:
+        """
+        Store new articles as a new part, skipping ones already stored
+        Args:
+            df: pd.DataFrame, article fields
+            text_column: str, column the article ID is computed from
+        Returns:
+            int: number of articles written
+        """
+        df = df[df[text_column].map(lambda text: isinstance(text, str))]
+        df = df.assign(**{ID_COLUMN: df[text_column].map(article_id)})
+        df = df.drop_duplicates(ID_COLUMN)
+        df = df[~df[ID_COLUMN].isin(self.ids())]
+        if df.empty:
+            return 0
+
+        os.makedirs(self.articles_dir, exist_ok=True)
+        columns = [ID_COLUMN] + [c for c in df.columns if c != ID_COLUMN]
+        path = os.path.join(
+            self.articles_dir, f"part-{len(self.article_parts()):05d}.parquet"
+        )
+        table = pa.Table.from_pandas(df[columns], preserve_index=False)
+        pq.write_table(table, f"{path}.tmp")
+        os.replace(f"{path}.tmp", path)
+        return len(df)
+
+    def write_predictions(self, name: str, values: Dict[str, Optional[str]]) -> None:
+        """
+        Add or update a prediction column without rewriting other columns
+        Args:
+            name: str, column name (e.g. prediction_few_shot)
+            values: dict, article_id -> text; merged over the stored column
+        """
+        os.makedirs(self.predictions_dir, exist_ok=True)
+        path = os.path.join(self.predictions_dir, f"{name}.parquet")
+        if os.path.exists(path):
+            stored = pq.read_table(path, memory_map=True).to_pydict()
+            values = {**dict(zip(stored[ID_COLUMN], stored[name])), **values}
+
+        table = pa.table(
+            {
+                ID_COLUMN: pa.array(list(values), pa.string()),
+                name: pa.array(list(values.values()), pa.string()),
+            }
+        )
+        pq.write_table(table, f"{path}.tmp")
+        os.replace(f"{path}.tmp", path)
+
+    def read(self, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """
+        Articles joined with prediction columns, reading only the requested columns
+        Args:
+            columns: list of article fields and prediction names (all by default)
+        Returns:
+            pd.DataFrame: article_id first, missing predictions as NaN
+        """
+        predictions = self.prediction_names()
+        if columns is None:
+            columns = self.columns()
+        wanted = [c for c in columns if c != ID_COLUMN]
+        article_fields = [c for c in wanted if c not in predictions]
+        unknown = set(article_fields) - set(self.article_columns())
+        if unknown:
+            raise KeyError(f"Unknown columns: {', '.join(sorted(unknown))}")
+
+        df = self._read_articles([ID_COLUMN] + article_fields).to_pandas()
+        for name in (c for c in wanted if c in predictions):
+            path = os.path.join(self.predictions_dir, f"{name}.parquet")
+            column = pq.read_table(path, memory_map=True).to_pandas()
+            df[name] = df[ID_COLUMN].map(column.set_index(ID_COLUMN)[name])
+        return df[[ID_COLUMN] + wanted]
+
+    def iter_articles(
+        self,
+        text_column: str = "article",
+        skip_keys: Optional[Set[str]] = None,
+        batch_size: int = 64,
+    ) -> Iterator[Tuple[str, str]]:
+        """
+        Stream (article_id, article) in batches, same contract as pipeline.iter_articles
+        """
+        skip_keys = skip_keys or set()
+        for path in self.article_parts():
+            parquet = pq.ParquetFile(path, memory_map=True)
+            if text_column not in parquet.schema_arrow.names:
+                continue
+            for batch in parquet.iter_batches(
+                batch_size, columns=[ID_COLUMN, text_column]
+            ):
+                data = batch.to_pydict()
+                for key, article in zip(data[ID_COLUMN], data[text_column]):
+                    if key in skip_keys or not isinstance(article, str):
+                        continue
+                    yield key, article
+
+    def _read_articles(self, columns: List[str]) -> pa.Table:
+        parts = self.article_parts()
+        if not parts:
+            return pa.table({c: pa.array([], pa.string()) for c in columns})
+        tables = []
+        for path in parts:
+            names = pq.read_schema(path).names
+            tables.append(
+                pq.read_table(
+                    path, columns=[c for c in columns if c in names], memory_map=True
+                )
+            )
+        # Columns missing from a part are filled with nulls
+        return pa.concat_tables(tables, promote_options="default")
+
+
+def convert_csv(
+    csv_path: str,
+    store: DatasetStore,
+    text_column: str = "article",
+    rename: Optional[Dict[str, str]] = None,
+    chunksize: int = 1024,
+) -> Tuple[int, List[str]]:
+    """
+    Import a CSV: article fields go to a new article part, prediction_*,
+    ground_truth and reasoning columns to prediction files
+    Args:
+        csv_path: str
+        store: DatasetStore
+        text_column: str, article text column
+        rename: dict, CSV column -> prediction name (e.g. prediction -> prediction_few_shot)
+    Returns:
+        tuple: (new articles, prediction names written)
+    """
+    rename = rename or {}
+    new_articles = 0
+    outputs: Dict[str, Dict[str, Optional[str]]] = {}
+    for chunk in pd.read_csv(csv_path, chunksize=chunksize):
+        output_columns = [
+            c for c in chunk.columns if c in rename or c.startswith(PREDICTION_PREFIXES)
+        ]
+        new_articles += store.append_articles(
+            chunk.drop(columns=output_columns), text_column
+        )
+
+        chunk = chunk[chunk[text_column].map(lambda text: isinstance(text, str))]
+        ids = chunk[text_column].map(article_id)
+        for column in output_columns:
+            values = outputs.setdefault(rename.get(column, column), {})
+            for key, value in zip(ids, chunk[column]):
+                values[key] = value if isinstance(value, str) else None
+
+    for name, values in outputs.items():
+        store.write_predictions(name, values)
+    return new_articles, list(outputs)
+
+
+def _rename_pair(value: str) -> Tuple[str, str]:
+    old, new = value.split("=", 1)
+    return old, new
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Parquet store of articles and predictions"
+    )
+    parser.add_argument("--store", default="data/store")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    convert = subparsers.add_parser("convert", help="import CSV datasets")
+    convert.add_argument("csv_paths", nargs="+")
+    convert.add_argument("--text-column", default="article")
+    convert.add_argument(
+        "--rename",
+        type=_rename_pair,
+        action="append",
+        default=[],
+        help="column=prediction_name, e.g. prediction=prediction_few_shot",
+    )
+
+    export = subparsers.add_parser("export", help="write selected columns to CSV")
+    export.add_argument("output_path")
+    export.add_argument("--columns", default=None, help="comma-separated")
+
+    subparsers.add_parser("info", help="list columns")
+    args = parser.parse_args()
+
+    store = DatasetStore(args.store)
+    if args.command == "convert":
+        for csv_path in args.csv_paths:
+            n_new, names = convert_csv(
+                csv_path, store, args.text_column, dict(args.rename)
+            )
+            print(
+                f"{csv_path}: {n_new} new articles, predictions: {', '.join(names) or '-'}"
+            )
+    elif args.command == "export":
+        columns = args.columns.split(",") if args.columns else None
+        store.read(columns).to_csv(args.output_path, index=False)
+    print(f"{len(store.ids())} articles, columns: {', '.join(store.columns())}")
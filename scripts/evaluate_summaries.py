@@ -0,0 +1,382 @@
+import argparse
+import functools
+import hashlib
+import json
+import os
+import pickle
+import re
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from scripts.text_utils import strip_think
+
+METRICS = ("rouge", "meteor", "bertscore")
+WORD_RE = re.compile(r"\w+|[^\w\s]")
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def clean_column(values: Sequence) -> List[str]:
+    """
+    Same cleanup for every column: <think> blocks removed, NaN as empty text
+    (evaluate only passes rows where both texts exist)
+    """
+    return [strip_think(v) if isinstance(v, str) else "" for v in values]
+
+
+# ROUGE (same tokenizer and formulas as rouge_score, on pre-tokenized texts)
+
+
+@functools.lru_cache(maxsize=2)
+def _rouge_tokenizer(use_stemmer: bool):
+    from rouge_score import tokenizers
+
+    return tokenizers.DefaultTokenizer(use_stemmer=use_stemmer)
+
+
+def rouge_tokens(
+    text: str, use_stemmer: bool = False
+) -> Tuple[List[str], List[List[str]]]:
+    """
+    rouge_score tokens of the text and of each of its lines (rougeLsum).
+    No stemming by default, like evaluate.load("rouge") in the notebook.
+    """
+    tokenizer = _rouge_tokenizer(use_stemmer)
+    lines = [tokenizer.tokenize(line) for line in text.split("\n")]
+    return tokenizer.tokenize(text), [line for line in lines if line]
+
+
+def _fmeasure(hits: int, n_ref: int, n_pred: int) -> float:
+    precision = hits / n_pred if n_pred else 0.0
+    recall = hits / n_ref if n_ref else 0.0
+    if precision + recall == 0:
+        return 0.0
+    return 2 * precision * recall / (precision + recall)
+
+
+def _ngram_f(ref: List[str], pred: List[str], n: int) -> float:
+    ref_ngrams = Counter(zip(*(ref[i:] for i in range(n))))
+    pred_ngrams = Counter(zip(*(pred[i:] for i in range(n))))
+    hits = sum((ref_ngrams & pred_ngrams).values())
+    return _fmeasure(hits, sum(ref_ngrams.values()), sum(pred_ngrams.values()))
+
+
+def _lcs_table(ref: List[str], pred: List[str]) -> List[List[int]]:
+    table = [[0] * (len(pred) + 1) for _ in range(len(ref) + 1)]
+    for i, r in enumerate(ref, start=1):
+        row, prev = table[i], table[i - 1]
+        for j, p in enumerate(pred, start=1):
+            row[j] = prev[j - 1] + 1 if r == p else max(prev[j], row[j - 1])
+    return table
+
+
+def _lcs_indices(ref: List[str], pred: List[str]) -> List[int]:
+    # Ties are broken as in rouge_score._backtrack_norec, which picks the LCS
+    # that rougeLsum unions over the prediction lines
+    table = _lcs_table(ref, pred)
+    i, j, indices = len(ref), len(pred), []
+    while i > 0 and j > 0:
+        if ref[i - 1] == pred[j - 1]:
+            indices.append(i - 1)
+            i, j = i - 1, j - 1
+        elif table[i][j - 1] > table[i - 1][j]:
+            j -= 1
+        else:
+            i -= 1
+    return indices[::-1]
+
+
+def _rouge_lsum(ref_lines: List[List[str]], pred_lines: List[List[str]]) -> float:
+    ref_counts = Counter(t for line in ref_lines for t in line)
+    pred_counts = Counter(t for line in pred_lines for t in line)
+    n_ref, n_pred = sum(ref_counts.values()), sum(pred_counts.values())
+    hits = 0
+    for ref in ref_lines:
+        union = sorted(set().union(*(_lcs_indices(ref, p) for p in pred_lines)))
+        for token in (ref[i] for i in union):
+            if ref_counts[token] > 0 and pred_counts[token] > 0:
+                hits += 1
+                ref_counts[token] -= 1
+                pred_counts[token] -= 1
+    return _fmeasure(hits, n_ref, n_pred)
+
+
+def rouge_rows(pairs: List[Tuple[tuple, tuple]]) -> List[Dict[str, float]]:
+    """
+    ROUGE F1 of (reference tokens, prediction tokens) pairs
+    """
+    rows = []
+    for (ref, ref_lines), (pred, pred_lines) in pairs:
+        rows.append(
+            {
+                "rouge1": _ngram_f(ref, pred, 1),
+                "rouge2": _ngram_f(ref, pred, 2),
+                "rougeL": _fmeasure(_lcs_table(ref, pred)[-1][-1], len(ref), len(pred)),
+                "rougeLsum": _rouge_lsum(ref_lines, pred_lines),
+            }
+        )
+    return rows
+
+
+def meteor_rows(pairs: List[Tuple[List[str], List[str]]]) -> List[Dict[str, float]]:
+    """
+    METEOR of (reference words, prediction words) pairs
+    """
+    from nltk.translate.meteor_score import meteor_score
+
+    return [
+        {"meteor": meteor_score([ref], pred) if ref and pred else 0.0}
+        for ref, pred in pairs
+    ]
+
+
+class Evaluator:
+    """
+    Batched ROUGE/METEOR/BERTScore with per-text caches of tokens and embeddings
+    """
+
+    def __init__(
+        self,
+        metrics: Sequence[str] = METRICS,
+        workers: Optional[int] = None,
+        cache_dir: Optional[str] = "data/cache/eval",
+        bert_model: str = "roberta-large",
+        device: Optional[str] = None,
+        batch_size: int = 32,
+        use_stemmer: bool = False,
+    ):
+        """
+        Initialize Evaluator
+        Args:
+            metrics: metrics to compute, subset of METRICS
+            workers: int, processes for ROUGE/METEOR (cpu count by default)
+            cache_dir: str, on-disk cache of tokens and embeddings (None disables)
+            bert_model: str, BERTScore model (default of bert_score for lang="en")
+            device: str, torch device (cuda, mps or cpu detected by default)
+            batch_size: int, BERTScore embedding batch size
+            use_stemmer: bool, Porter stemming of ROUGE tokens (off in the notebook,
+                scores with and without it are not comparable)
+        """
+        self.metrics = metrics
+        self.workers = workers or os.cpu_count() or 1
+        self.cache_dir = cache_dir
+        self.bert_model = bert_model
+        self.device = device
+        self.batch_size = batch_size
+        self.use_stemmer = use_stemmer
+        self._scorer = None
+        self._caches: Dict[str, dict] = {}
+
+    def score(self, references: List[str], predictions: List[str]) -> pd.DataFrame:
+        """
+        Per-row scores of predictions against references
+        """
+        rows = [{} for _ in references]
+        if "rouge" in self.metrics:
+            name = "rouge-stemmed" if self.use_stemmer else "rouge-unstemmed"
+            tokenize = functools.partial(rouge_tokens, use_stemmer=self.use_stemmer)
+            ref_tokens = self._tokens(name, references, tokenize)
+            pred_tokens = self._tokens(name, predictions, tokenize)
+            pairs = list(zip(ref_tokens, pred_tokens))
+            self._merge(rows, self._parallel(rouge_rows, pairs))
+        if "meteor" in self.metrics:
+            ref_words = self._tokens("words", references, self._words)
+            pred_words = self._tokens("words", predictions, self._words)
+            pairs = list(zip(ref_words, pred_words))
+            self._merge(rows, self._parallel(meteor_rows, pairs))
+        if "bertscore" in self.metrics:
+            self._merge(rows, self._bertscore(references, predictions))
+        return pd.DataFrame(rows)
+
+    def evaluate(
+        self, df: pd.DataFrame, reference_column: str = "ground_truth"
+    ) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Score every prediction_* column on the rows that have both a reference
+        and a prediction (a store also holds articles that were never labeled)
+        Returns:
+            tuple: (per-row report, NaN where not scored; aggregate report with
+                one row per column and its n_scored)
+        """
+        has_reference = df[reference_column].map(lambda v: isinstance(v, str))
+        per_row, aggregate = [], {}
+        for column in [c for c in df.columns if c.startswith("prediction")]:
+            scored = has_reference & df[column].map(lambda v: isinstance(v, str))
+            scores = self.score(
+                clean_column(df.loc[scored, reference_column]),
+                clean_column(df.loc[scored, column]),
+            )
+            scores.index = df.index[scored]
+            aggregate[column] = {**scores.mean().to_dict(), "n_scored": len(scores)}
+            per_row.append(scores.reindex(df.index).add_prefix(f"{column}_"))
+            print(
+                f"{column} ({len(scores)} rows): "
+                + ", ".join(f"{k} {v * 100:.2f}" for k, v in scores.mean().items())
+            )
+
+        self.save_caches()
+        summary = pd.DataFrame(aggregate).T
+        if "n_scored" in summary:
+            summary["n_scored"] = summary["n_scored"].astype(int)
+        return pd.concat(per_row, axis=1), summary
+
+    def save_caches(self) -> None:
+        if not self.cache_dir:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        for name, cache in self._caches.items():
+            path = os.path.join(self.cache_dir, f"{name}.pkl")
+            with open(f"{path}.tmp", "wb") as f:
+                pickle.dump(cache, f)
+            os.replace(f"{path}.tmp", path)
+
+    @staticmethod
+    def _words(text: str) -> List[str]:
+        return WORD_RE.findall(text.lower())
+
+    @staticmethod
+    def _merge(rows: List[dict], scores: List[dict]) -> None:
+        for row, score in zip(rows, scores):
+            row.update(score)
+
+    def _cache(self, name: str) -> dict:
+        if name not in self._caches:
+            path = os.path.join(self.cache_dir or "", f"{name}.pkl")
+            if self.cache_dir and os.path.exists(path):
+                with open(path, "rb") as f:
+                    self._caches[name] = pickle.load(f)
+            else:
+                self._caches[name] = {}
+        return self._caches[name]
+
+    def _tokens(self, name: str, texts: List[str], tokenize) -> list:
+        cache = self._cache(name)
+        hashes = [text_hash(text) for text in texts]
+        for h, text in zip(hashes, texts):
+            if h not in cache:
+                cache[h] = tokenize(text)
+        return [cache[h] for h in hashes]
+
+    def _parallel(self, fn, pairs: list) -> list:
+        if self.workers <= 1 or len(pairs) < 2 * self.workers:
+            return fn(pairs)
+        size = -(-len(pairs) // self.workers)
+        batches = [pairs[i : i + size] for i in range(0, len(pairs), size)]
+        with ProcessPoolExecutor(self.workers) as pool:
+            return [row for rows in pool.map(fn, batches) for row in rows]
+
+    def _bertscore(self, references: List[str], predictions: List[str]) -> List[dict]:
+        import torch
+
+        refs = self._embeddings(references)
+        preds = self._embeddings(predictions)
+        rows = []
+        for (ref_emb, ref_idf), (pred_emb, pred_idf) in zip(refs, preds):
+            if not len(ref_idf) or not len(pred_idf):
+                rows.append({"bertscore_f1": 0.0})
+                continue
+            # Greedy cosine matching with idf weights, as in bert_score
+            sim = pred_emb.float() @ ref_emb.float().T
+            precision = (sim.max(dim=1).values * pred_idf).sum() / pred_idf.sum()
+            recall = (sim.max(dim=0).values * ref_idf).sum() / ref_idf.sum()
+            f1 = 2 * precision * recall / (precision + recall)
+            rows.append({"bertscore_f1": float(torch.nan_to_num(f1))})
+        return rows
+
+    def _embeddings(self, texts: List[str]) -> list:
+        cache = self._cache(f"bertscore-{self.bert_model.replace('/', '_')}")
+        hashes = [text_hash(text) for text in texts]
+        missing = list(
+            {h: text for h, text in zip(hashes, texts) if h not in cache}.items()
+        )
+        if missing:
+            scorer = self._bert_scorer()
+            from bert_score.utils import get_bert_embedding
+
+            tokenizer = scorer._tokenizer
+            idf_dict = _IdfDict({tokenizer.sep_token_id: 0, tokenizer.cls_token_id: 0})
+            for i in range(0, len(missing), self.batch_size):
+                batch = missing[i : i + self.batch_size]
+                embeddings, masks, idf = get_bert_embedding(
+                    [text for _, text in batch],
+                    scorer._model,
+                    scorer._tokenizer,
+                    idf_dict,
+                    device=scorer.device,
+                )
+                embeddings = embeddings / embeddings.norm(dim=-1, keepdim=True)
+                for (h, _), emb, mask, weights in zip(batch, embeddings, masks, idf):
+                    n = int(mask.sum())
+                    cache[h] = (emb[:n].half().cpu(), weights[:n].float().cpu())
+        return [cache[h] for h in hashes]
+
+    def _bert_scorer(self):
+        if self._scorer is None:
+            import torch
+            from bert_score import BERTScorer
+
+            device = self.device
+            if device is None:
+                if torch.cuda.is_available():
+                    device = "cuda"
+                elif torch.backends.mps.is_available():
+                    device = "mps"
+                else:
+                    device = "cpu"
+            self._scorer = BERTScorer(model_type=self.bert_model, device=device)
+        return self._scorer
+
+
+class _IdfDict(dict):
+    """
+    Weight 1 for every token except the ones set explicitly
+    """
+
+    def __missing__(self, key):
+        return 1.0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score prediction_* columns")
+    parser.add_argument("--dataset-path", default="data/dataset/ready_dataset.csv")
+    parser.add_argument("--reference-column", default="ground_truth")
+    parser.add_argument("--metrics", default=",".join(METRICS))
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--device", default=None)
+    parser.add_argument(
+        "--stemmer", action="store_true", help="Porter-stem ROUGE tokens"
+    )
+    parser.add_argument("--cache-dir", default="data/cache/eval")
+    parser.add_argument("--rows-output", default="eval_rows.csv")
+    parser.add_argument("--summary-output", default="eval_summary.json")
+    args = parser.parse_args()
+
+    evaluator = Evaluator(
+        metrics=args.metrics.split(","),
+        workers=args.workers,
+        cache_dir=args.cache_dir or None,
+        device=args.device,
+        use_stemmer=args.stemmer,
+    )
+    if os.path.isdir(args.dataset_path):
+        from scripts.dataset_store import DatasetStore
+
+        # Reference and prediction columns only, article bodies are not read
+        store = DatasetStore(args.dataset_path)
+        df = store.read(
+            [args.reference_column]
+            + [c for c in store.prediction_names() if c.startswith("prediction")]
+        )
+    else:
+        df = pd.read_csv(args.dataset_path)
+    per_row, aggregate = evaluator.evaluate(df, args.reference_column)
+
+    per_row.to_csv(args.rows_output, index=False)
+    with open(args.summary_output, "w", encoding="utf-8") as f:
+        json.dump(aggregate.to_dict(orient="index"), f, indent=2)
+    print(f"Saved scores to {args.rows_output} and {args.summary_output}")
@@ -0,0 +1,250 @@
+import re
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+from scripts.text_utils import split_paragraphs, split_sentences
+
+WORD_RE = re.compile(r"[a-z][a-z0-9']+|\d+")
+COMPANY_SUFFIXES = r"Inc|Corp|Co|Ltd|Plc|Cos|Bros"
+# Sentence boundary of texts with punctuation stripped (". " became "  "),
+# not before the suffix of "Acme Pharmaceuticals, Inc."
+STRIPPED_BOUNDARY_RE = re.compile(
+    rf"(?<=[a-z0-9])\s{{2,}}(?=[A-Z][a-z])(?!(?:{COMPANY_SUFFIXES})\b)"
+)
+
+TICKER_RE = re.compile(
+    r"\b(?:NASDAQ|NYSE|AMEX|NYSEARCA|OTC|TSX)\b\s*:?\s*[A-Z]{1,5}\b|\(\s*[A-Z]{1,5}\s*\)"
+)
+NUMBER_RE = re.compile(r"\d")
+PERCENT_RE = re.compile(r"\d\s*%|\bpercent\b|\bpct\b|\bbps\b|basis points", re.I)
+MONEY_RE = re.compile(r"[$€£]\s?\d|\b(?:billion|million|trillion|bn|mln)\b", re.I)
+FINANCE_RE = re.compile(
+    r"\b(?:revenue|revenues|earnings|eps|profit|loss|guidance|forecast|outlook|"
+    r"quarter|dividend|shares|acquisition|acquire|merger|deal|sales|margin|"
+    r"estimate|consensus|beat|missed|raised|cut|ipo|buyback|repurchase)\b",
+    re.I,
+)
+# Promotional blocks of syndicated articles, never worth prompt tokens
+BOILERPLATE_RE = re.compile(
+    r"Zacks has just released|Zacks Special Report|Special Report|Click to get this free"
+    r"|Free Report|Looking for Stocks with|More Stock News|Want the latest recommendations"
+    r"|Today, you can download|you can download \d+ Best Stocks|See the full list|"
+    r"complete list of today.s Zacks|Zacks Investment Research|Free story|"
+    r"Did you miss .* stock explosion|Early investors stand to make|kick yourself",
+    re.I,
+)
+# Ranking blurbs: kept if informative, but never preferred
+RANK_RE = re.compile(r"Zacks Rank", re.I)
+
+STOPWORDS = frozenset(
+    "a an and are as at be been but by for from has have he in is it its of on or "
+    "that the their there they this to was were which will with would also than "
+    "s t about after before into over more most said says".split()
+)
+
+MIN_WORDS = 4
+# Company suffixes and abbreviations that end with a period mid-sentence
+ABBREVIATION_RE = re.compile(
+    rf"\b(?:{COMPANY_SUFFIXES}|Mr|Mrs|Ms|Dr|St|vs|No|U\.S|U\.K|Jan|Feb|Mar|Apr|"
+    r"Jun|Jul|Aug|Sep|Sept|Oct|Nov|Dec)\.$"
+)
+
+
+def split_article(text: str) -> List[Tuple[int, str]]:
+    """
+    Sentences of an article with their paragraph number.
+    Lines without punctuation (cleaned datasets) are split on double spaces.
+    """
+    sentences = []
+    for paragraph_id, paragraph in enumerate(
+        split_paragraphs(text.replace("\n", "\n\n"))
+    ):
+        if re.search(r"[.!?]\s", paragraph + " "):
+            pieces = []
+            for piece in split_sentences(paragraph):
+                if pieces and ABBREVIATION_RE.search(pieces[-1]):
+                    pieces[-1] = f"{pieces[-1]} {piece}"
+                else:
+                    pieces.append(piece)
+        else:
+            pieces = [p.strip() for p in STRIPPED_BOUNDARY_RE.split(paragraph)]
+        sentences.extend((paragraph_id, piece) for piece in pieces if piece)
+    return sentences
+
+
+def _tfidf(sentences: List[str]) -> np.ndarray:
+    """
+    L2-normalized TF-IDF matrix with one row per sentence
+    """
+    vocabulary = {}
+    rows, cols = [], []
+    for i, sentence in enumerate(sentences):
+        for word in WORD_RE.findall(sentence.lower()):
+            if word in STOPWORDS:
+                continue
+            rows.append(i)
+            cols.append(vocabulary.setdefault(word, len(vocabulary)))
+
+    matrix = np.zeros((len(sentences), max(len(vocabulary), 1)))
+    np.add.at(matrix, (rows, cols), 1.0)
+    document_frequency = (matrix > 0).sum(axis=0)
+    matrix *= np.log((1 + len(sentences)) / (1 + document_frequency)) + 1
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+
+def _textrank(similarity: np.ndarray, damping: float = 0.85, iterations: int = 50):
+    """
+    PageRank over the sentence similarity graph
+    """
+    n = len(similarity)
+    np.fill_diagonal(similarity, 0)
+    weights = similarity.sum(axis=1, keepdims=True)
+    transition = similarity / np.where(weights == 0, 1, weights)
+    scores = np.full(n, 1 / n)
+    for _ in range(iterations):
+        updated = (1 - damping) / n + damping * transition.T @ scores
+        if np.abs(updated - scores).sum() < 1e-6:
+            return updated
+        scores = updated
+    return scores
+
+
+def finance_boost(sentence: str) -> float:
+    """
+    Multiplier for sentences with tickers, numbers, percentages and money amounts
+    """
+    boost = 1.0
+    boost += 0.3 * min(len(TICKER_RE.findall(sentence)), 2)
+    boost += 0.2 * min(len(NUMBER_RE.findall(sentence)), 5) / 5
+    boost += 0.3 if PERCENT_RE.search(sentence) else 0.0
+    boost += 0.3 if MONEY_RE.search(sentence) else 0.0
+    boost += 0.1 * min(len(FINANCE_RE.findall(sentence)), 3)
+    if RANK_RE.search(sentence):
+        boost *= 0.3
+    return boost
+
+
+def score_sentences(sentences: List[str]) -> np.ndarray:
+    """
+    TextRank centrality times finance boosts and a mild lead bias;
+    boilerplate and fragments score 0
+    """
+    if not sentences:
+        return np.zeros(0)
+    matrix = _tfidf(sentences)
+    centrality = _textrank(matrix @ matrix.T)
+    centrality = centrality / centrality.max()
+
+    position = np.arange(len(sentences))
+    # News puts the key facts first
+    lead = 1 + 1 / (1 + position / 2)
+    boosts = np.array([finance_boost(sentence) for sentence in sentences])
+    keep = np.array(
+        [
+            len(sentence.split()) >= MIN_WORDS and not BOILERPLATE_RE.search(sentence)
+            for sentence in sentences
+        ]
+    )
+    return centrality * boosts * lead * keep
+
+
+def summarize(text: str, n_sentences: int = 3) -> List[str]:
+    """
+    Extractive summary: the highest scoring sentences in article order
+    """
+    sentences = [sentence for _, sentence in split_article(text)]
+    scores = score_sentences(sentences)
+    top = sorted(np.argsort(-scores, kind="stable")[:n_sentences])
+    return [sentences[i] for i in top if scores[i] > 0]
+
+
+def approx_tokens(text: str) -> int:
+    """
+    Rough token count (~4 characters per token) when no tokenizer is at hand
+    """
+    return len(text) // 4 + 1
+
+
+def truncate(
+    text: str, max_tokens: int, count_tokens: Callable[[str], int] = approx_tokens
+) -> str:
+    """
+    Longest prefix within the budget, cut at a word boundary when there is one.
+    Never empty for non-empty text (at least the first word is kept).
+    """
+    text = text.strip()
+    if count_tokens(text) <= max_tokens:
+        return text
+    # Binary search on characters, count_tokens is monotonic in the prefix length
+    low, high = 0, len(text)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if count_tokens(text[:middle]) <= max_tokens:
+            low = middle
+        else:
+            high = middle - 1
+    prefix = text[:low]
+    if " " in prefix and low < len(text) and not text[low].isspace():
+        prefix = prefix[: prefix.rindex(" ")]
+    return prefix.strip() or text.split()[0]
+
+
+def compress(
+    text: str,
+    max_tokens: int,
+    count_tokens: Optional[Callable[[str], int]] = None,
+) -> str:
+    """
+    Keep the most informative sentences within a token budget, in article order.
+    Boilerplate is dropped even when the article already fits.
+    Args:
+        text: str, article
+        max_tokens: int, budget of the compressed article
+        count_tokens: callable, text -> tokens (e.g. QwenModel.count_tokens)
+    Returns:
+        str: compressed article, paragraphs on separate lines (the top sentence
+            truncated to the budget when no sentence fits whole)
+    """
+    count_tokens = count_tokens or approx_tokens
+    split = split_article(text)
+    sentences = [sentence for _, sentence in split]
+    boilerplate = [bool(BOILERPLATE_RE.search(sentence)) for sentence in sentences]
+    if not any(boilerplate) and count_tokens(text) <= max_tokens:
+        return text
+
+    scores = score_sentences(sentences)
+    chosen, used = [], 0
+    for i in np.argsort(-scores, kind="stable"):
+        if boilerplate[i]:
+            continue
+        # +1 approximates the separator
+        cost = count_tokens(sentences[i]) + 1
+        if used + cost <= max_tokens:
+            chosen.append(i)
+            used += cost
+    if not chosen and sentences:
+        # No sentence fits on its own: cut the best one rather than send nothing
+        best = next(
+            (i for i in np.argsort(-scores, kind="stable") if not boilerplate[i]),
+            0,
+        )
+        return truncate(sentences[best], max_tokens, count_tokens)
+
+    paragraphs: List[List[str]] = []
+    last_paragraph = None
+    for i in sorted(chosen):
+        paragraph_id, sentence = split[i]
+        if paragraph_id != last_paragraph:
+            paragraphs.append([])
+            last_paragraph = paragraph_id
+        paragraphs[-1].append(sentence)
+    # Cleaned texts have no full stops left, a double space marks the boundary
+    return "\n".join(
+        "".join(
+            sentence + (" " if sentence[-1] in ".!?" else "  ")
+            for sentence in paragraph
+        ).strip()
+        for paragraph in paragraphs
+    )
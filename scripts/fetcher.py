@@ -0,0 +1,259 @@
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import (
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Iterable, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from newspaper import Article
+from newspaper.exceptions import ArticleException
+from requests.adapters import HTTPAdapter
+
+from scripts.metrics import counter, histogram, log_event
+
+USER_AGENT = (
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+)
+
+FETCH_REQUESTS = counter(
+    "fetch_requests_total",
+    "Article downloads by result (downloaded, not_modified, http_error, error)",
+    ["result"],
+)
+FETCH_SECONDS = histogram("fetch_seconds", "Article download time", ["result"])
+FETCH_BATCH_SECONDS = histogram(
+    "fetch_batch_seconds", "Download and parse time of a fetch_many call"
+)
+
+
+def parse_article(url: str, html: str) -> Optional[str]:
+    """
+    Extract article text from downloaded html (runs in a worker process)
+    Args:
+        url: str
+        html: str
+    Returns:
+        str: article text or None
+    """
+    a = Article(url)
+    try:
+        a.download(input_html=html)
+        a.parse()
+    except ArticleException as e:
+        print(f"Error parsing article {url}: {e}")
+        return None
+    return a.text
+
+
+class ArticleFetcher:
+    """
+    Concurrent article downloader with pooled connections and an on-disk HTML cache
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = "data/cache/html",
+        max_workers: int = 16,
+        per_host_limit: int = 4,
+        timeout: float = 10.0,
+        parse_workers: Optional[int] = None,
+    ):
+        """
+        Initialize ArticleFetcher
+        Args:
+            cache_dir: str, raw HTML with ETag/Last-Modified for conditional GET (None disables)
+            max_workers: int, concurrent downloads
+            per_host_limit: int, concurrent downloads per host
+            timeout: float, connect/read timeout in seconds
+            parse_workers: int, processes parsing HTML (cpu count by default),
+                started on the first fetch_many and kept until close()
+        """
+        self.cache_dir = cache_dir
+        self.max_workers = max_workers
+        self.per_host_limit = per_host_limit
+        self.timeout = timeout
+        self.parse_workers = parse_workers
+
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = USER_AGENT
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+        # Process start-up costs more than parsing a handful of pages, so the
+        # pools are shared by all fetch_many calls
+        self._parse_pool: Optional[Executor] = None
+        self._download_pool = ThreadPoolExecutor(max_workers)
+
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def fetch_html(self, url: str) -> Optional[str]:
+        """
+        Download html, revalidating the cached copy with a conditional GET
+        Args:
+            url: str
+        Returns:
+            str: html or None on error
+        """
+        html_path, meta_path = self._cache_paths(url)
+        cached, meta = None, {}
+        if html_path and os.path.exists(html_path) and os.path.exists(meta_path):
+            with open(html_path, encoding="utf-8") as f:
+                cached = f.read()
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+
+        headers = {}
+        if cached is not None:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        start = time.perf_counter()
+        try:
+            with self._host_slot(url):
+                response = self.session.get(url, headers=headers, timeout=self.timeout)
+        except requests.RequestException as e:
+            print(f"Error downloading article {url}: {e}")
+            self._observe("error", start)
+            return cached
+
+        if response.status_code == 304 and cached is not None:
+            self._observe("not_modified", start)
+            return cached
+        if response.status_code != 200:
+            print(f"Error downloading article {url}: HTTP {response.status_code}")
+            self._observe("http_error", start)
+            return cached
+        self._observe("downloaded", start)
+
+        html = response.text
+        if html_path:
+            self._write(html_path, html)
+            self._write(
+                meta_path,
+                json.dumps(
+                    {
+                        "url": url,
+                        "etag": response.headers.get("ETag"),
+                        "last_modified": response.headers.get("Last-Modified"),
+                    }
+                ),
+            )
+        return html
+
+    def fetch_many(self, urls: Iterable[str]) -> Dict[str, Optional[str]]:
+        """
+        Download concurrently and parse on a process pool as pages arrive
+        Args:
+            urls: iterable of urls
+        Returns:
+            dict: url -> article text (None on error)
+        """
+        start = time.perf_counter()
+        urls = list(dict.fromkeys(urls))
+        texts: Dict[str, Optional[str]] = {}
+        parse_pool = self._get_parse_pool()
+
+        def download(url: str) -> Optional[Future]:
+            # Parsing starts as soon as the page arrives
+            html = self.fetch_html(url)
+            return None if html is None else parse_pool.submit(parse_article, url, html)
+
+        downloads = {url: self._download_pool.submit(download, url) for url in urls}
+        for url, future in downloads.items():
+            try:
+                parsed = future.result()
+                texts[url] = None if parsed is None else parsed.result()
+            except BrokenProcessPool as e:
+                # A worker died (e.g. killed on OOM); the next call gets a new pool
+                print(f"Error parsing article {url}: {e}")
+                texts[url] = None
+                self._discard_parse_pool(parse_pool)
+            except Exception as e:
+                print(f"Error parsing article {url}: {e}")
+                texts[url] = None
+
+        seconds = time.perf_counter() - start
+        FETCH_BATCH_SECONDS.observe(seconds)
+        log_event(
+            "fetch_many",
+            urls=len(urls),
+            parsed=sum(text is not None for text in texts.values()),
+            seconds=round(seconds, 3),
+        )
+        return {url: texts.get(url) for url in urls}
+
+    def close(self) -> None:
+        self._download_pool.shutdown()
+        if self._parse_pool is not None:
+            self._parse_pool.shutdown()
+            self._parse_pool = None
+        self.session.close()
+
+    def __enter__(self) -> "ArticleFetcher":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    @staticmethod
+    def _observe(result: str, start: float) -> None:
+        FETCH_REQUESTS.inc(result=result)
+        FETCH_SECONDS.observe(time.perf_counter() - start, result=result)
+
+    def _get_parse_pool(self) -> Executor:
+        with self._lock:
+            if self._parse_pool is None:
+                if self.parse_workers == 0:
+                    self._parse_pool = ThreadPoolExecutor(1)
+                else:
+                    # Workers start on the first submit from a download thread;
+                    # forking there could copy locks held by sibling threads
+                    self._parse_pool = ProcessPoolExecutor(
+                        self.parse_workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+            return self._parse_pool
+
+    def _discard_parse_pool(self, pool: Executor) -> None:
+        with self._lock:
+            if self._parse_pool is not pool:
+                return
+            self._parse_pool = None
+        pool.shutdown(wait=False)
+
+    def _host_slot(self, url: str) -> threading.BoundedSemaphore:
+        host = urlsplit(url).netloc
+        with self._lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.BoundedSemaphore(self.per_host_limit)
+            return self._host_slots[host]
+
+    def _cache_paths(self, url: str) -> Tuple[Optional[str], Optional[str]]:
+        if not self.cache_dir:
+            return None, None
+        digest = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        base = os.path.join(self.cache_dir, digest)
+        return f"{base}.html", f"{base}.json"
+
+    @staticmethod
+    def _write(path: str, content: str) -> None:
+        with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+            f.write(content)
+        os.replace(f"{path}.tmp", path)
@@ -1,11 +1,31 @@
+import argparse
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 import feedparser
 import pandas as pd
 from newspaper import Article
 from newspaper.exceptions import ArticleException
-from tqdm import tqdm
+
+from scripts.fetcher import ArticleFetcher
+from scripts.metrics import counter, histogram, log_event
+from scripts.news_index import NewsIndex, content_digest
+
+MIN_ARTICLE_LENGTH = 1900
+
+RSS_SECONDS = histogram(
+    "rss_stage_seconds", "News ingestion time by stage (feed, fetch, save)", ["stage"]
+)
+RSS_ARTICLES = counter(
+    "rss_articles_total",
+    "Feed entries by outcome (stored, duplicate, summary_fallback)",
+    ["outcome"],
+)
+ARTICLE_FETCH_SECONDS = histogram(
+    "article_fetch_seconds", "fetch_article_text time", ["result"]
+)
 
 
 def fetch_article_text(url: str) -> str:
@@ -16,39 +36,58 @@ def fetch_article_text(url: str) -> str:
     Returns:
         str: article text
     """
+    start = time.perf_counter()
     a = Article(url)
     try:
         a.download()
         a.parse()
     except ArticleException as e:
         print(f"Error downloading or parsing article: {e}")
+        ARTICLE_FETCH_SECONDS.observe(time.perf_counter() - start, result="error")
         return None
+    ARTICLE_FETCH_SECONDS.observe(time.perf_counter() - start, result="ok")
     return a.text
 
 
-def get_yahoo_news_rss(symbol: str, start: str = None, end: str = None) -> pd.DataFrame:
+def parse_feed(symbol: str, start: str = None, end: str = None) -> list:
     """
-    Get Yahoo News RSS feed
+    Parse Yahoo News RSS feed entries in a date range
     Args:
         symbol: str
         start: str
         end: str
     Returns:
-        pd.DataFrame: news dataframe
+        list: (entry, published datetime) pairs
     """
     url = f"https://feeds.finance.yahoo.com/rss/2.0/headline?s={symbol}&region=US&lang=en-US"
-    feed = feedparser.parse(url)
-    news = []
-    for entry in tqdm(feed.entries):
+    with RSS_SECONDS.time(stage="feed"):
+        feed = feedparser.parse(url)
+    entries = []
+    for entry in feed.entries:
         pub_date = datetime(*entry.published_parsed[:6])
         if start and pub_date < datetime.fromisoformat(start):
             continue
         if end and pub_date > datetime.fromisoformat(end):
             continue
+        entries.append((entry, pub_date))
+    return entries
 
-        extracted_text = fetch_article_text(entry.link)
-        if not extracted_text or len(extracted_text) < 1900:
+
+def build_news(entries: list, texts: dict) -> list:
+    """
+    Build news records, falling back to the RSS summary for short texts
+    Args:
+        entries: list of (entry, published datetime)
+        texts: dict, link -> extracted text
+    Returns:
+        list: news records
+    """
+    news = []
+    for entry, pub_date in entries:
+        extracted_text = texts.get(entry.link)
+        if not extracted_text or len(extracted_text) < MIN_ARTICLE_LENGTH:
             extracted_text = entry.summary
+            RSS_ARTICLES.inc(outcome="summary_fallback")
 
         source = entry.link.split("/")[2]
 
@@ -60,20 +99,196 @@ def get_yahoo_news_rss(symbol: str, start: str = None, end: str = None) -> pd.Da
                 "published": pub_date.strftime("%Y-%m-%d %H:%M:%S"),
             }
         )
+    return news
 
-    df = pd.DataFrame(news)
-    if os.path.exists("yahoo_news_tsla.csv"):
-        df.to_csv("data/yahoo_news_tsla.csv", index=False, mode="a", header=False)
-    else:
-        df.to_csv("data/yahoo_news_tsla.csv", index=False)
-    print(f"Saved {len(df)} news to yahoo_news.csv")
 
+def news_path(symbol: str, output_dir: str = "data") -> str:
+    """
+    Per-ticker CSV, lowercase as in the existing data/yahoo_news_tsla.csv history
+    """
+    return os.path.join(output_dir, f"yahoo_news_{symbol.lower()}.csv")
 
-if __name__ == "__main__":
-    ticker = "TSLA"
-    dataset_path = f"data/yahoo_news_{ticker}.csv"
+
+def save_news(df: pd.DataFrame, symbol: str, output_dir: str = "data") -> str:
+    """
+    Append news to the per-ticker CSV
+    Returns:
+        str: dataset path
+    """
+    dataset_path = news_path(symbol, output_dir)
     if os.path.exists(dataset_path):
-        start_date = pd.read_csv(dataset_path)["published"].max()
-        news = get_yahoo_news_rss(ticker, start=start_date)
+        df.to_csv(dataset_path, index=False, mode="a", header=False)
     else:
-        news = get_yahoo_news_rss(ticker)
+        df.to_csv(dataset_path, index=False)
+    return dataset_path
+
+
+def get_yahoo_news_rss(
+    symbol: str,
+    start: str = None,
+    end: str = None,
+    fetcher: ArticleFetcher = None,
+    output_dir: str = "data",
+) -> pd.DataFrame:
+    """
+    Get Yahoo News RSS feed
+    Args:
+        symbol: str
+        start: str
+        end: str
+        fetcher: ArticleFetcher, shared concurrent downloader (created if None)
+        output_dir: str, directory of yahoo_news_<symbol>.csv
+    Returns:
+        pd.DataFrame: news dataframe
+    """
+    started = time.perf_counter()
+    entries = parse_feed(symbol, start, end)
+
+    own_fetcher = fetcher is None
+    fetcher = fetcher or ArticleFetcher()
+    with RSS_SECONDS.time(stage="fetch"):
+        texts = fetcher.fetch_many(entry.link for entry, _ in entries)
+    if own_fetcher:
+        fetcher.close()
+
+    df = pd.DataFrame(build_news(entries, texts))
+    with RSS_SECONDS.time(stage="save"):
+        dataset_path = save_news(df, symbol, output_dir)
+    RSS_ARTICLES.inc(len(df), outcome="stored")
+    log_event(
+        "rss_ingest",
+        symbol=symbol,
+        entries=len(entries),
+        stored=len(df),
+        seconds=round(time.perf_counter() - started, 3),
+    )
+    print(f"Saved {len(df)} news to {dataset_path}")
+    return df
+
+
+def seed_index(
+    index: NewsIndex, ticker: str, output_dir: str = "data", chunksize: int = 1024
+) -> int:
+    """
+    Record the CSV history of a ticker the index has never seen (links, texts and
+    the latest publication time), so the first run does not store it again
+    Args:
+        index: NewsIndex
+        ticker: str
+        output_dir: str, directory of yahoo_news_<symbol>.csv
+    Returns:
+        int: number of articles recorded
+    """
+    dataset_path = news_path(ticker, output_dir)
+    if index.watermark(ticker) is not None or not os.path.exists(dataset_path):
+        return 0
+
+    seeded, latest = 0, None
+    for chunk in pd.read_csv(
+        dataset_path,
+        usecols=["link", "extracted_text", "published"],
+        chunksize=chunksize,
+    ):
+        texts = [t if isinstance(t, str) else None for t in chunk["extracted_text"]]
+        index.add(zip(chunk["link"], texts))
+        seeded += len(chunk)
+        published = chunk["published"].dropna()
+        if not published.empty:
+            latest = max(latest or "", published.max())
+    if latest:
+        index.set_watermark(ticker, latest)
+    log_event("news_index_seeded", ticker=ticker, articles=seeded)
+    return seeded
+
+
+def ingest_tickers(
+    tickers: list,
+    output_dir: str = "data",
+    index_path: str = "data/news_index.sqlite",
+    feed_workers: int = 16,
+    fetcher: ArticleFetcher = None,
+) -> dict:
+    """
+    Incrementally ingest several tickers, never storing the same article twice
+    Args:
+        tickers: list of symbols (case-insensitive, stored upper-case)
+        output_dir: str, directory of yahoo_news_<symbol>.csv
+        index_path: str, NewsIndex with seen links, content hashes and watermarks
+        feed_workers: int, feeds polled concurrently
+        fetcher: ArticleFetcher, shared concurrent downloader (created if None)
+    Returns:
+        dict: ticker -> number of stored articles
+    """
+    # One watermark per ticker, matching the lowercase CSV name of news_path
+    tickers = list(dict.fromkeys(ticker.upper() for ticker in tickers))
+    index = NewsIndex(index_path)
+    for ticker in tickers:
+        seed_index(index, ticker, output_dir)
+    watermarks = index.watermarks()
+
+    with ThreadPoolExecutor(feed_workers) as pool:
+        feeds = dict(
+            zip(
+                tickers,
+                pool.map(lambda t: parse_feed(t, start=watermarks.get(t)), tickers),
+            )
+        )
+
+    # Links already stored, or claimed by an earlier ticker in this run, are skipped
+    claimed = set()
+    new_entries = {}
+    for ticker, entries in feeds.items():
+        new_entries[ticker] = []
+        for entry, pub_date in entries:
+            if entry.link in claimed or index.has_link(entry.link):
+                continue
+            claimed.add(entry.link)
+            new_entries[ticker].append((entry, pub_date))
+
+    own_fetcher = fetcher is None
+    fetcher = fetcher or ArticleFetcher()
+    with RSS_SECONDS.time(stage="fetch"):
+        texts = fetcher.fetch_many(claimed)
+    if own_fetcher:
+        fetcher.close()
+
+    stored = {}
+    seen_contents = set()
+    for ticker, entries in new_entries.items():
+        news = []
+        for record in build_news(entries, texts):
+            digest = content_digest(record["extracted_text"])
+            if digest in seen_contents or index.has_content(record["extracted_text"]):
+                # Syndicated copy: remember the link so it is not fetched again
+                index.add([(record["link"], None)])
+                RSS_ARTICLES.inc(outcome="duplicate")
+                continue
+            seen_contents.add(digest)
+            news.append(record)
+
+        stored[ticker] = len(news)
+        RSS_ARTICLES.inc(len(news), outcome="stored")
+        if news:
+            with RSS_SECONDS.time(stage="save"):
+                save_news(pd.DataFrame(news), ticker, output_dir)
+            index.add((record["link"], record["extracted_text"]) for record in news)
+        if entries:
+            latest = max(pub_date for _, pub_date in entries)
+            index.set_watermark(ticker, latest.strftime("%Y-%m-%d %H:%M:%S"))
+
+    index.close()
+    return stored
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load Yahoo Finance news")
+    parser.add_argument("tickers", nargs="*", default=["TSLA"])
+    parser.add_argument("--output-dir", default="data")
+    parser.add_argument("--index-path", default="data/news_index.sqlite")
+    args = parser.parse_args()
+
+    stored = ingest_tickers(
+        args.tickers, output_dir=args.output_dir, index_path=args.index_path
+    )
+    for ticker, count in stored.items():
+        print(f"{ticker}: saved {count} news")
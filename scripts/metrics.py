@@ -0,0 +1,395 @@
+import argparse
+import atexit
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter as _Counter
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Seconds
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+# Tokens per second
+RATE_BUCKETS = (1, 2, 5, 10, 20, 30, 50, 75, 100, 200)
+
+logger = logging.getLogger("news_summarizer")
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(label, "")) for label in self.labels)
+
+    def _label_text(self, key: Tuple[str, ...], extra: str = "") -> str:
+        pairs = [f'{k}="{_escape(v)}"' for k, v in zip(self.labels, key)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """
+    Monotonic counter
+    """
+
+    kind = "counter"
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = _Counter()
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        with self._lock:
+            self._values[self._key(labels)] += amount
+
+    def value(self, **labels: Any) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            return self.header() + [
+                f"{self.name}{self._label_text(key)} {value}"
+                for key, value in sorted(self._values.items())
+            ]
+
+
+class Gauge(Counter):
+    """
+    Value that goes up and down
+    """
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels: Any) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    """
+    Cumulative bucket histogram with sum and count
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self, *args: Any, buckets: Sequence[float] = LATENCY_BUCKETS, **kwargs: Any
+    ):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+        # label key -> (bucket counts, sum, count)
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.setdefault(key, [[0] * len(self.buckets), 0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][i] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    @contextmanager
+    def time(self, **labels: Any) -> Iterator[None]:
+        """
+        Observe the duration of a block
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._values.items()):
+                for bound, bucket_count in zip(self.buckets, counts):
+                    le = self._label_text(key, f'le="{bound}"')
+                    lines.append(f"{self.name}_bucket{le} {bucket_count}")
+                inf = self._label_text(key, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{inf} {count}")
+                lines.append(f"{self.name}_sum{self._label_text(key)} {total}")
+                lines.append(f"{self.name}_count{self._label_text(key)} {count}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Registry:
+    """
+    Process-wide metrics, rendered in the Prometheus text format
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def get(self, cls: type, name: str, help_text: str, **kwargs: Any) -> Any:
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = cls(name, help_text, **kwargs)
+            return self._metrics[name]
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(line for metric in metrics for line in metric.render()) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def counter(name: str, help_text: str, labels: Sequence[str] = ()) -> Counter:
+    return REGISTRY.get(Counter, name, help_text, labels=labels)
+
+
+def gauge(name: str, help_text: str, labels: Sequence[str] = ()) -> Gauge:
+    return REGISTRY.get(Gauge, name, help_text, labels=labels)
+
+
+def histogram(
+    name: str,
+    help_text: str,
+    labels: Sequence[str] = (),
+    buckets: Sequence[float] = LATENCY_BUCKETS,
+) -> Histogram:
+    return REGISTRY.get(Histogram, name, help_text, labels=labels, buckets=buckets)
+
+
+def render() -> str:
+    return REGISTRY.render()
+
+
+# Structured logs
+
+
+def log_event(event: str, **fields: Any) -> None:
+    """
+    One JSON line per event on the news_summarizer logger
+    """
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(
+            json.dumps(
+                {"ts": round(time.time(), 3), "event": event, **fields}, default=str
+            )
+        )
+
+
+def configure_logging(level: Optional[str] = None) -> None:
+    """
+    Send structured logs to stderr (LOG_LEVEL, INFO by default; WARNING silences them)
+    """
+    if logger.handlers:
+        return
+    handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(level or os.environ.get("LOG_LEVEL", "INFO"))
+    logger.propagate = False
+
+
+# Inference health
+
+
+class InferenceWindow:
+    """
+    Recent completions, used to tell whether inference has become slow
+    """
+
+    def __init__(self, size: int = 50):
+        self._items: deque = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float, decode_tps: Optional[float]) -> None:
+        with self._lock:
+            self._items.append((time.time(), seconds, decode_tps))
+
+    def health(self, min_decode_tps: float = 0.0) -> Dict[str, Any]:
+        """
+        Median latency and decode rate of recent completions; status "slow" when
+        the median decode rate is below min_decode_tps (0 disables the check)
+        """
+        with self._lock:
+            items = list(self._items)
+        rates = sorted(rate for _, _, rate in items if rate)
+        latencies = sorted(seconds for _, seconds, _ in items)
+        median_rate = rates[len(rates) // 2] if rates else None
+        slow = bool(
+            min_decode_tps and median_rate is not None and median_rate < min_decode_tps
+        )
+        return {
+            "status": "slow" if slow else "ok",
+            "recent_completions": len(items),
+            "latency_s_p50": latencies[len(latencies) // 2] if latencies else None,
+            "decode_tps_p50": median_rate,
+            "last_completion_ts": items[-1][0] if items else None,
+        }
+
+
+INFERENCE = InferenceWindow()
+
+
+def inference_health() -> Dict[str, Any]:
+    return INFERENCE.health(float(os.environ.get("MIN_DECODE_TPS", 0)))
+
+
+# HTTP endpoint for processes without a web framework (Streamlit, batch jobs)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        if self.path.startswith("/metrics"):
+            body, status = render().encode(), 200
+            content_type = "text/plain; version=0.0.4"
+        elif self.path.startswith("/health"):
+            health = inference_health()
+            body = json.dumps(health).encode()
+            status = 200 if health["status"] == "ok" else 503
+            content_type = "application/json"
+        else:
+            body, status, content_type = b"not found", 404, "text/plain"
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args: Any) -> None:
+        # Scrapes every few seconds would flood stderr
+        pass
+
+
+def start_http_server(port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """
+    Serve /metrics and /health on a daemon thread
+    """
+    server = ThreadingHTTPServer((host, port), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# Sampling profiler
+
+
+class SamplingProfiler:
+    """
+    Stack sampler on a background thread. Writes folded stacks
+    ("frame;frame;frame count") for flamegraph.pl or speedscope.
+    """
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.samples: Dict[str, int] = _Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def dump(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in sorted(self.samples.items()):
+                f.write(f"{stack} {count}\n")
+
+    def _sample(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(
+                        f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+                    )
+                    frame = frame.f_back
+                self.samples[";".join(reversed(stack))] += 1
+
+
+def maybe_start_profiler() -> Optional[SamplingProfiler]:
+    """
+    Start the sampling profiler if PROFILE_OUTPUT is set; stacks are written at exit
+    """
+    path = os.environ.get("PROFILE_OUTPUT")
+    if not path:
+        return None
+    profiler = SamplingProfiler(float(os.environ.get("PROFILE_INTERVAL", 0.01)))
+    profiler.start()
+
+    def finish() -> None:
+        profiler.stop()
+        profiler.dump(path)
+
+    atexit.register(finish)
+    return profiler
+
+
+def observe_stream(
+    tokens: Iterator[str], on_done: Callable[[float, Optional[float], int], None]
+) -> Iterator[str]:
+    """
+    Pass tokens through and report (seconds, time to first token, pieces) at the end
+    """
+    start = time.perf_counter()
+    first = None
+    pieces = 0
+    try:
+        for token in tokens:
+            if first is None:
+                first = time.perf_counter() - start
+            pieces += 1
+            yield token
+    finally:
+        on_done(time.perf_counter() - start, first, pieces)
+
+
+def check(url: str, timeout: float = 5.0) -> int:
+    """
+    Exit code for a container healthcheck: 1 if /health reports slow inference.
+    A metrics server that is not up yet (no session started) counts as healthy.
+    """
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            print(response.read().decode())
+            return 0
+    except urllib.error.HTTPError as e:
+        print(e.read().decode())
+        return 1
+    except (urllib.error.URLError, OSError) as e:
+        print(f"metrics server unavailable: {e}")
+        return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inference health check")
+    parser.add_argument("url", nargs="?", default="http://localhost:9100/health")
+    args = parser.parse_args()
+    raise SystemExit(check(args.url))
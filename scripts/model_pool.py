@@ -0,0 +1,237 @@
+import gc
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+from scripts.backends import create_model
+from scripts.metrics import log_event
+
+
+def current_rss_mb() -> float:
+    """
+    Resident memory of the current process in MB (Linux /proc, 0 elsewhere)
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return 0.0
+    return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+
+class PooledModel:
+    """
+    Pool entry with load statistics
+    """
+
+    def __init__(self, path: str, model: Any, load_s: float, rss_mb: float):
+        self.path = path
+        self.model = model
+        self.load_s = load_s
+        # Measured RSS growth, at least the mmapped file size once pages are touched
+        self.file_mb = os.path.getsize(path) / (1024 * 1024)
+        self.rss_mb = max(rss_mb, 0.0)
+        self.memory_mb = max(self.rss_mb, self.file_mb)
+        self.last_used = time.time()
+        self.lock = threading.Lock()
+        # Outstanding leases; a leased model is never evicted
+        self.leases = 0
+
+
+class ModelLease:
+    """
+    Model checked out of a pool with the lock serializing generation on it.
+    The pool keeps the model loaded until the lease is released.
+    """
+
+    def __init__(self, pool: "ModelPool", entry: PooledModel):
+        self.model = entry.model
+        self.lock = entry.lock
+        self._pool = pool
+        self._entry: Optional[PooledModel] = entry
+
+    def release(self) -> None:
+        """
+        Give the model back to the pool (idempotent)
+        """
+        entry, self._entry = self._entry, None
+        if entry is not None:
+            self._pool._release(entry)
+
+    def __enter__(self) -> "ModelLease":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
+
+
+class ModelPool:
+    """
+    Bounded pool of GGUF models with least recently used eviction.
+    Weights are mmapped, so contexts over the same file share page cache.
+    """
+
+    def __init__(
+        self,
+        max_memory_mb: float = 8192,
+        max_models: int = 2,
+        factory: Optional[Callable[[str], Any]] = None,
+    ):
+        """
+        Initialize ModelPool
+        Args:
+            max_memory_mb: float, cap on the estimated resident memory of all models
+            max_models: int, cap on the number of loaded models
+            factory: callable, path -> model (QwenModel with mmap by default)
+        """
+        self.max_memory_mb = max_memory_mb
+        self.max_models = max_models
+        self.factory = factory or (
+            lambda path: create_model("llama_cpp", model_path=path, use_mmap=True)
+        )
+        self.evictions = 0
+        self._models: OrderedDict[str, PooledModel] = OrderedDict()
+        self._lock = threading.Lock()
+        # Per path, so a slow load blocks neither hits nor loads of other models
+        self._load_locks: Dict[str, threading.Lock] = {}
+
+    def get(self, path: str) -> Any:
+        """
+        Model for a GGUF path, loading it (and evicting others) if needed
+        """
+        return self._entry(path).model
+
+    def acquire(self, path: str) -> ModelLease:
+        """
+        Lease on the model of a GGUF path; release it (or use it as a context
+        manager) once generation is done
+        """
+        return ModelLease(self, self._entry(path, lease=True))
+
+    def preload(self, path: Optional[str]) -> None:
+        """
+        Load a default model at startup if it exists
+        """
+        if path and os.path.exists(path):
+            self.get(path)
+
+    def evict(self, path: str) -> bool:
+        """
+        Drop a model from the pool unless it is generating; memory is freed once
+        no job holds it
+        """
+        with self._lock:
+            entry = self._models.get(path)
+            if entry is None or entry.leases:
+                return False
+            del self._models[path]
+        log_event("model_evicted", model=os.path.basename(path))
+        del entry
+        self.evictions += 1
+        gc.collect()
+        return True
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """
+        Load time and memory of every loaded model, most recently used last
+        """
+        with self._lock:
+            return [
+                {
+                    "model": os.path.basename(entry.path),
+                    "load_s": entry.load_s,
+                    "rss_mb": entry.rss_mb,
+                    "file_mb": entry.file_mb,
+                    "last_used": entry.last_used,
+                }
+                for entry in self._models.values()
+            ]
+
+    def _entry(self, path: str, lease: bool = False) -> PooledModel:
+        with self._lock:
+            entry = self._touch(path, lease)
+            if entry is not None:
+                return entry
+            load_lock = self._load_locks.setdefault(path, threading.Lock())
+
+        with load_lock:
+            with self._lock:
+                # Loaded by another session while this one waited
+                entry = self._touch(path, lease)
+                if entry is not None:
+                    return entry
+                # Make room using the file size as the estimate of the new model
+                self._evict_for(os.path.getsize(path) / (1024 * 1024), extra_models=1)
+
+            # RSS growth includes concurrent loads of other paths, if any
+            rss_before = current_rss_mb()
+            start = time.perf_counter()
+            model = self.factory(path)
+            entry = PooledModel(
+                path, model, time.perf_counter() - start, current_rss_mb() - rss_before
+            )
+            log_event(
+                "model_loaded",
+                model=os.path.basename(path),
+                load_s=round(entry.load_s, 2),
+                rss_mb=round(entry.rss_mb),
+            )
+            with self._lock:
+                entry.leases += lease
+                self._models[path] = entry
+                # The measured footprint may be larger than the estimate
+                self._evict_for(0, extra_models=0, keep=path)
+            return entry
+
+    def _touch(self, path: str, lease: bool) -> Optional[PooledModel]:
+        """
+        Loaded entry of a path marked as most recently used (caller holds lock)
+        """
+        entry = self._models.get(path)
+        if entry is not None:
+            self._models.move_to_end(path)
+            entry.last_used = time.time()
+            entry.leases += lease
+        return entry
+
+    def _release(self, entry: PooledModel) -> None:
+        with self._lock:
+            entry.leases -= 1
+            # Models kept over the caps while leased go now
+            self._evict_for(0, extra_models=0)
+
+    def _evict_for(
+        self, needed_mb: float, extra_models: int, keep: Optional[str] = None
+    ) -> None:
+        """
+        Evict least recently used models until the new one fits (caller holds lock).
+        Leased models are kept, even if the pool stays over its caps until released.
+        """
+        while self._models:
+            used = sum(entry.memory_mb for entry in self._models.values())
+            over_memory = used + needed_mb > self.max_memory_mb
+            over_count = len(self._models) + extra_models > self.max_models
+            if not (over_memory or over_count):
+                return
+
+            victim = next(
+                (
+                    p
+                    for p, entry in self._models.items()
+                    if p != keep and not entry.leases
+                ),
+                None,
+            )
+            if victim is None:
+                return
+            entry = self._models.pop(victim)
+            log_event(
+                "model_evicted",
+                model=os.path.basename(victim),
+                memory_mb=round(entry.memory_mb),
+            )
+            del entry
+            self.evictions += 1
+            gc.collect()
@@ -0,0 +1,104 @@
+import hashlib
+import os
+import sqlite3
+from typing import Dict, Iterable, Optional, Tuple
+
+from scripts.summary_cache import normalize_text
+
+
+def _digest(value: str) -> bytes:
+    return hashlib.blake2b(value.encode("utf-8"), digest_size=16).digest()
+
+
+def content_digest(text: str) -> bytes:
+    """
+    Digest of the whitespace-normalized article text
+    """
+    return _digest(normalize_text(text))
+
+
+class NewsIndex:
+    """
+    On-disk index of stored articles: seen links, content hashes and per-ticker
+    high-water marks
+    """
+
+    def __init__(self, path: str = "data/news_index.sqlite"):
+        """
+        Initialize NewsIndex
+        Args:
+            path: str, SQLite file
+        """
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS links (digest BLOB PRIMARY KEY) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS contents (digest BLOB PRIMARY KEY) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS watermarks (
+                ticker TEXT PRIMARY KEY, published TEXT NOT NULL
+            );
+            """
+        )
+        self._db.commit()
+
+    def has_link(self, link: str) -> bool:
+        return (
+            self._db.execute(
+                "SELECT 1 FROM links WHERE digest = ?", (_digest(link),)
+            ).fetchone()
+            is not None
+        )
+
+    def has_content(self, text: str) -> bool:
+        return (
+            self._db.execute(
+                "SELECT 1 FROM contents WHERE digest = ?", (content_digest(text),)
+            ).fetchone()
+            is not None
+        )
+
+    def add(self, items: Iterable[Tuple[str, Optional[str]]]) -> None:
+        """
+        Record stored articles
+        Args:
+            items: iterable of (link, text)
+        """
+        items = list(items)
+        self._db.executemany(
+            "INSERT OR IGNORE INTO links VALUES (?)",
+            [(_digest(link),) for link, _ in items],
+        )
+        self._db.executemany(
+            "INSERT OR IGNORE INTO contents VALUES (?)",
+            [(content_digest(text),) for _, text in items if text],
+        )
+        self._db.commit()
+
+    def watermark(self, ticker: str) -> Optional[str]:
+        """
+        Latest stored publication time of a ticker, "%Y-%m-%d %H:%M:%S"
+        """
+        row = self._db.execute(
+            "SELECT published FROM watermarks WHERE ticker = ?", (ticker,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def watermarks(self) -> Dict[str, str]:
+        return dict(self._db.execute("SELECT ticker, published FROM watermarks"))
+
+    def set_watermark(self, ticker: str, published: str) -> None:
+        """
+        Move the ticker high-water mark forward
+        """
+        self._db.execute(
+            "INSERT INTO watermarks VALUES (?, ?) ON CONFLICT(ticker) "
+            "DO UPDATE SET published = MAX(published, excluded.published)",
+            (ticker, published),
+        )
+        self._db.commit()
+
+    def close(self) -> None:
+        self._db.close()
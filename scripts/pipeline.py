@@ -0,0 +1,215 @@
+import io
+import json
+import os
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+import pandas as pd
+
+
+def iter_articles(
+    dataset_path: str,
+    chunksize: int = 64,
+    key_column: Optional[str] = None,
+    text_column: str = "article",
+    skip_keys: Optional[Set[str]] = None,
+) -> Iterator[Tuple[str, str]]:
+    """
+    Stream articles from a CSV or a DatasetStore directory in chunks
+    Args:
+        dataset_path: str
+        chunksize: int, rows held in memory at once
+        key_column: str, column with a stable row key (row number by default,
+            article_id for a store)
+        text_column: str
+        skip_keys: set, keys that are already done
+    Returns:
+        Iterator[tuple]: (key, article)
+    """
+    skip_keys = skip_keys or set()
+    if os.path.isdir(dataset_path):
+        from scripts.dataset_store import DatasetStore
+
+        yield from DatasetStore(dataset_path).iter_articles(
+            text_column, skip_keys, batch_size=chunksize
+        )
+        return
+
+    for chunk in pd.read_csv(dataset_path, chunksize=chunksize):
+        keys = chunk[key_column] if key_column else chunk.index
+        for key, article in zip(keys, chunk[text_column]):
+            key = str(key)
+            if key in skip_keys or not isinstance(article, str):
+                continue
+            yield key, article
+
+
+class JsonlCheckpoint:
+    """
+    Append-only JSONL output, one finished record per line
+    """
+
+    def __init__(self, path: str, key_field: str = "key"):
+        """
+        Initialize JsonlCheckpoint
+        Args:
+            path: str, output file, created on first append
+            key_field: str, name of the row key field in every record
+        """
+        self.path = path
+        self.key_field = key_field
+        self._file = None
+
+    def done_keys(self) -> Set[str]:
+        """
+        Keys of records already written (a truncated last line is ignored)
+        """
+        return {key for _, key, _ in self.scan()}
+
+    def index(self) -> Tuple[Dict[str, int], List[str]]:
+        """
+        Byte offset of the latest record of every key and the record fields,
+        without keeping the records in memory
+        Returns:
+            tuple: (key -> offset, fields other than the key in first-seen order)
+        """
+        offsets: Dict[str, int] = {}
+        fields: Dict[str, None] = {}
+        for offset, key, record in self.scan():
+            offsets[key] = offset
+            fields.update(dict.fromkeys(f for f in record if f != self.key_field))
+        return offsets, list(fields)
+
+    def scan(self) -> Iterator[Tuple[int, str, Dict[str, Any]]]:
+        """
+        (offset, key, record) of every decodable line; a missing file has none
+        """
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, "rb") as f:
+            offset = 0
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    yield offset, str(record[self.key_field]), record
+                except (json.JSONDecodeError, UnicodeDecodeError, KeyError, TypeError):
+                    pass
+                offset += len(line)
+
+    def append(self, key: str, record: Dict[str, Any]) -> None:
+        """
+        Append a finished record and flush it to disk
+        """
+        if self._file is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+            # A crash mid-write leaves a partial line; start on a fresh one
+            if self._file.tell() > 0:
+                with open(self.path, "rb") as f:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b"\n":
+                        self._file.write("\n")
+
+        self._file.write(
+            json.dumps({self.key_field: key, **record}, ensure_ascii=False) + "\n"
+        )
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> "JsonlCheckpoint":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def export_csv(
+    dataset_path: str,
+    checkpoint_path: str,
+    output_path: str,
+    chunksize: int = 1024,
+    key_column: Optional[str] = None,
+) -> None:
+    """
+    Join finished records back onto the dataset and write a CSV chunk by chunk.
+    Only record offsets are held in memory; records are read per chunk.
+    Args:
+        dataset_path: str, source CSV
+        checkpoint_path: str, JSONL written by JsonlCheckpoint (may be missing)
+        output_path: str
+    """
+    offsets, fields = JsonlCheckpoint(checkpoint_path).index()
+
+    header = True
+    with _open_records(checkpoint_path) as records:
+        for chunk in pd.read_csv(dataset_path, chunksize=chunksize):
+            keys = (chunk[key_column] if key_column else chunk.index).astype(str)
+            found = [
+                _read_record(records, offsets[key]) if key in offsets else {}
+                for key in keys
+            ]
+            for field in fields:
+                chunk[field] = [record.get(field) for record in found]
+            chunk.to_csv(
+                output_path, index=False, mode="w" if header else "a", header=header
+            )
+            header = False
+
+
+def export_store(
+    store_path: str, checkpoint_path: str, columns: Dict[str, str]
+) -> None:
+    """
+    Write finished records of a checkpoint as prediction columns of a DatasetStore
+    Args:
+        store_path: str, store directory (keys are article IDs)
+        checkpoint_path: str, JSONL written by JsonlCheckpoint
+        columns: dict, record field -> prediction column
+            (e.g. {"prediction": "prediction_few_shot_qwen"})
+    """
+    from scripts.dataset_store import DatasetStore
+
+    values: Dict[str, Dict[str, Optional[str]]] = {
+        name: {} for name in columns.values()
+    }
+    # Later records of a key replace earlier ones
+    for _, key, record in JsonlCheckpoint(checkpoint_path).scan():
+        for field, name in columns.items():
+            values[name][key] = record.get(field)
+
+    store = DatasetStore(store_path)
+    for name, column in values.items():
+        if column:
+            store.write_predictions(name, column)
+
+
+def store_column(output_path: str, prefix: str) -> str:
+    """
+    Store column name for an --output-path, e.g. few_shot_dataset_by_qwen.csv ->
+    prediction_few_shot_dataset_by_qwen (evaluate_summaries only scores
+    columns starting with "prediction")
+    Args:
+        output_path: str, CSV path or column name
+        prefix: str, "prediction", "ground_truth" or "reasoning"
+    """
+    name = os.path.splitext(os.path.basename(output_path))[0]
+    return name if name.startswith(prefix) else f"{prefix}_{name}"
+
+
+def _open_records(checkpoint_path: str):
+    """
+    Binary handle of the checkpoint (an empty stream if it does not exist)
+    """
+    if os.path.exists(checkpoint_path):
+        return open(checkpoint_path, "rb")
+    return io.BytesIO()
+
+
+def _read_record(f, offset: int) -> Dict[str, Any]:
+    f.seek(offset)
+    return json.loads(f.readline())
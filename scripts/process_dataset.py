@@ -1,28 +1,113 @@
-import pandas as pd
-from tqdm import tqdm
+import argparse
+import os
 
-from prompts import FEW_SHOT_EXAMPLES, SYSTEM_PROMPT
-from scripts.summarize_news import QwenModel
+from prompts import SYSTEM_PROMPT
+from scripts.batch_engine import BatchSummarizer, default_split
+from scripts.pipeline import (
+    JsonlCheckpoint,
+    export_csv,
+    export_store,
+    iter_articles,
+    store_column,
+)
 
 if __name__ == "__main__":
-    model_path = "/app/data/models/Qwen3-1.7B-Q8_0.gguf"
-    dataset_path = "/app/data/dataset/clean_dataset.csv"
+    parser = argparse.ArgumentParser(description="Summarize dataset with local model")
+    parser.add_argument("--model-path", default="/app/data/models/Qwen3-1.7B-Q8_0.gguf")
+    parser.add_argument(
+        "--dataset-path",
+        default="/app/data/dataset/clean_dataset.csv",
+        help="CSV or DatasetStore directory",
+    )
+    parser.add_argument(
+        "--output-path",
+        default="few_shot_dataset_by_qwen.csv",
+        help="output CSV, or the prediction column name for a store "
+        '(prefixed with "prediction_" if needed)',
+    )
+    parser.add_argument(
+        "--checkpoint-path",
+        default=None,
+        help="append-only JSONL of finished rows (<output-path>.jsonl)",
+    )
+    parser.add_argument("--key-column", default=None, help="row key (row number)")
+    parser.add_argument("--workers", type=int, default=4, help="model processes")
+    parser.add_argument(
+        "--threads", type=int, default=None, help="threads per worker (cpus / workers)"
+    )
+    parser.add_argument(
+        "--zero-shot",
+        action="store_true",
+        help="leave the few-shot examples out of the system prompt",
+    )
+    parser.add_argument(
+        "--long", action="store_true", help="map-reduce articles over the context"
+    )
+    parser.add_argument(
+        "--structured",
+        action="store_true",
+        help="grammar-constrained Headline/Core Essence/Key Points output",
+    )
+    parser.add_argument(
+        "--compress-tokens",
+        type=int,
+        default=None,
+        help="keep the most informative sentences within this many tokens",
+    )
+    parser.add_argument("--n-ctx", type=int, default=16000)
+    parser.add_argument(
+        "--draft",
+        default=None,
+        help='speculative decoding: "prompt_lookup" or a draft GGUF path '
+        "(single worker: keeps n_ctx x vocab logits, ~9.7 GB at 16000 for Qwen3)",
+    )
+    parser.add_argument(
+        "--cache-path", default="/app/data/cache/summaries.sqlite", help="summary cache"
+    )
+    args = parser.parse_args()
+    if args.long and args.structured:
+        parser.error("--structured cannot be combined with --long")
+    if args.draft and args.workers > 1:
+        # Every worker would allocate its own n_ctx x vocab logits buffer
+        parser.error("--draft needs --workers 1 (and preferably a smaller --n-ctx)")
     # model_path = "/Users/danildorofeev/.lmstudio/models/Qwen/Qwen3-1.7B-GGUF/Qwen3-1.7B-Q8_0.gguf"
-    llm = QwenModel(
-        model_path=model_path, enable_thinking=False, enable_few_shot_examples=False
+    checkpoint_path = args.checkpoint_path or f"{args.output_path}.jsonl"
+
+    engine = BatchSummarizer(
+        model_path=args.model_path,
+        n_workers=args.workers,
+        threads_per_worker=args.threads or default_split(args.workers),
+        system_prompt=SYSTEM_PROMPT,
+        enable_thinking=False,
+        enable_few_shot_examples=not args.zero_shot,
+        n_ctx=args.n_ctx,
+        cache_path=args.cache_path or None,
+        long_mode=args.long,
+        draft=args.draft,
+        structured=args.structured,
+        compress_tokens=args.compress_tokens,
     )
+    print(f"{engine.n_workers} workers x {engine.threads_per_worker} threads")
 
-    df = pd.read_csv(dataset_path)
+    with JsonlCheckpoint(checkpoint_path) as checkpoint:
+        done = checkpoint.done_keys()
+        print(f"Skipping {len(done)} already summarized rows")
 
-    for index, row in tqdm(df.iterrows(), total=len(df)):
-        article = row["article"]
-        response = llm.run(
-            SYSTEM_PROMPT.format(
-                think_mode="/no_think", few_shot_examples=FEW_SHOT_EXAMPLES
-            ),
-            article,
-            stream=False,
+        articles = iter_articles(
+            args.dataset_path, key_column=args.key_column, skip_keys=done
         )
-        df.loc[index, "prediction"] = response
+        for key, prediction in engine.run(articles):
+            if prediction is not None:
+                checkpoint.append(key, {"prediction": prediction})
 
-    df.to_csv("few_shot_dataset_by_qwen.csv", index=False)
+    if os.path.isdir(args.dataset_path):
+        column = store_column(args.output_path, "prediction")
+        export_store(args.dataset_path, checkpoint_path, {"prediction": column})
+        print(f"Wrote column {column} to {args.dataset_path}")
+    else:
+        export_csv(
+            args.dataset_path,
+            checkpoint_path,
+            args.output_path,
+            key_column=args.key_column,
+        )
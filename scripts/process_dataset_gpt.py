@@ -1,46 +1,74 @@
-import pandas as pd
-from openai import OpenAI
-from tqdm import tqdm
+import argparse
+import asyncio
+import os
 
 from prompts import SYSTEM_PROMPT
-
-client = OpenAI(
-    base_url="https://openrouter.ai/api/v1",
-    api_key="api_key",
+from scripts.async_labeler import AsyncLabeler
+from scripts.pipeline import (
+    JsonlCheckpoint,
+    export_csv,
+    export_store,
+    iter_articles,
+    store_column,
 )
 
-# df = pd.read_csv("/app/data/dataset.csv")
-df = pd.read_csv(
-    "/Users/danildorofeev/Desktop/financial-news-summarizer/data/dataset.csv"
-)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Label dataset via OpenAI API")
+    # parser.add_argument("--dataset-path", default="/app/data/dataset.csv")
+    parser.add_argument(
+        "--dataset-path",
+        default="/Users/danildorofeev/Desktop/financial-news-summarizer/data/dataset.csv",
+    )
+    parser.add_argument(
+        "--output-path",
+        default="reasoning_dataset_by_qwen.csv",
+        help="output CSV, or the ground truth column name for a DatasetStore "
+        'directory (prefixed with "ground_truth_" if needed)',
+    )
+    parser.add_argument("--checkpoint-path", default=None)
+    parser.add_argument("--key-column", default=None)
+    # parser.add_argument("--model", default="gpt-4o-mini")
+    parser.add_argument("--model", default="qwen/qwen3-235b-a22b")
+    parser.add_argument("--base-url", default="https://openrouter.ai/api/v1")
+    parser.add_argument("--concurrency", type=int, default=8, help="requests in flight")
+    parser.add_argument("--rpm", type=float, default=60, help="requests per minute")
+    parser.add_argument("--max-retries", type=int, default=5)
+    args = parser.parse_args()
+    checkpoint_path = args.checkpoint_path or f"{args.output_path}.jsonl"
 
-for index, row in tqdm(df.iterrows(), total=len(df)):
-    article = row["article"]
-    # response = client.chat.completions.create(
-    #     model="gpt-4o-mini",
-    #     messages=[
-    #         {"role": "system", "content": SYSTEM_PROMPT},
-    #         {"role": "user", "content": article}
-    #     ]
-    # )
-    response = client.chat.completions.create(
-        model="qwen/qwen3-235b-a22b",
-        stream=True,
-        extra_body={"reasoning": True},
-        messages=[
-            {"role": "system", "content": SYSTEM_PROMPT},
-            {"role": "user", "content": article},
-        ],
+    labeler = AsyncLabeler(
+        base_url=args.base_url,
+        api_key=os.environ.get("OPENAI_API_KEY", "api_key"),
+        model=args.model,
+        system_prompt=SYSTEM_PROMPT,
+        max_concurrency=args.concurrency,
+        requests_per_minute=args.rpm,
+        max_retries=args.max_retries,
     )
-    thinking, answer = "", ""
-    for chunk in response:
-        d = chunk.choices[0].delta
-        if hasattr(d, "reasoning_content"):
-            thinking += d.reasoning_content
-        if hasattr(d, "content"):
-            answer += d.content
 
-    df.loc[index, "ground_truth"] = response.choices[0].message.content
-    break
+    with JsonlCheckpoint(checkpoint_path) as checkpoint:
+        done = checkpoint.done_keys()
+        articles = iter_articles(
+            args.dataset_path, key_column=args.key_column, skip_keys=done
+        )
+        failed = asyncio.run(labeler.run(articles, checkpoint))
+        if failed:
+            print(f"{failed} rows failed, rerun to retry them")
 
-df.to_csv("reasoning_dataset_by_qwen.csv", index=False)
+    if os.path.isdir(args.dataset_path):
+        column = store_column(args.output_path, "ground_truth")
+        # ground_truth_<name> comes with reasoning_<name>
+        reasoning = "reasoning" + column[len("ground_truth") :]
+        export_store(
+            args.dataset_path,
+            checkpoint_path,
+            {"ground_truth": column, "reasoning": reasoning},
+        )
+        print(f"Wrote columns {column}, {reasoning} to {args.dataset_path}")
+    else:
+        export_csv(
+            args.dataset_path,
+            checkpoint_path,
+            args.output_path,
+            key_column=args.key_column,
+        )
@@ -0,0 +1,53 @@
+from typing import Iterator, Union
+
+
+class RemoteModel:
+    """
+    QwenModel-compatible client of the summarizer server (scripts/server.py)
+    """
+
+    def __init__(self, base_url: str = "http://localhost:8000/v1"):
+        """
+        Initialize RemoteModel
+        Args:
+            base_url: str, OpenAI-compatible url of the server
+        """
+        from openai import OpenAI
+
+        self.client = OpenAI(base_url=base_url, api_key="local")
+        self.model = self.client.models.list().data[0].id
+        # The server owns the summary cache
+        self.cache = None
+
+    def run(
+        self, system_prompt: str, article: str, stream: bool = False, **extra_body
+    ) -> Union[str, Iterator[str]]:
+        """
+        Run with system prompt on the server
+        """
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": article},
+        ]
+        if not stream:
+            result = self.client.chat.completions.create(
+                model=self.model, messages=messages, extra_body=extra_body
+            )
+            return result.choices[0].message.content
+        return self._stream(messages, extra_body)
+
+    def run_long(
+        self, system_prompt: str, article: str, stream: bool = False
+    ) -> Union[str, Iterator[str]]:
+        """
+        Map-reduce summarization on the server
+        """
+        return self.run(system_prompt, article, stream=stream, long_document=True)
+
+    def _stream(self, messages: list, extra_body: dict) -> Iterator[str]:
+        result = self.client.chat.completions.create(
+            model=self.model, messages=messages, stream=True, extra_body=extra_body
+        )
+        for chunk in result:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
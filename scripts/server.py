@@ -0,0 +1,474 @@
+import argparse
+import asyncio
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import Any, Dict, List, Optional, Tuple
+
+import uvicorn
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import (
+    JSONResponse,
+    PlainTextResponse,
+    Response,
+    StreamingResponse,
+)
+
+from prompts import CHUNK_PROMPT, SYSTEM_PROMPT
+from scripts.batch_engine import default_split
+from scripts.metrics import (
+    configure_logging,
+    counter,
+    gauge,
+    histogram,
+    inference_health,
+    log_event,
+    maybe_start_profiler,
+    render,
+)
+from scripts.summarize_news import QwenModel
+
+QUEUE_DEPTH = gauge("server_queue_depth", "Requests waiting for a slot")
+ACTIVE_SLOTS = gauge("server_active_slots", "Slots decoding a request")
+REQUESTS = counter(
+    "server_requests_total",
+    "Chat completions by outcome (completed, failed, rejected, cancelled)",
+    ["outcome"],
+)
+QUEUE_WAIT = histogram("server_queue_wait_seconds", "Time from enqueue to slot")
+
+# Seconds an idle slot waits for a request before checking for chunk work
+CHUNK_POLL_INTERVAL = 0.05
+# Seconds between client disconnect checks of a non-streaming request
+DISCONNECT_POLL_INTERVAL = 1.0
+
+
+class JobCancelled(Exception):
+    """
+    The client of a job went away while its long document was being mapped
+    """
+
+
+class Job:
+    """
+    One queued chat completion
+    """
+
+    def __init__(
+        self,
+        system_prompt: str,
+        article: str,
+        long_document: bool,
+        loop: asyncio.AbstractEventLoop,
+    ):
+        self.id = f"chatcmpl-{uuid.uuid4().hex}"
+        self.system_prompt = system_prompt
+        self.article = article
+        self.long_document = long_document
+        self.loop = loop
+        # Tokens, then None on completion or an Exception on failure
+        self.tokens: asyncio.Queue = asyncio.Queue()
+        self.cancelled = threading.Event()
+        self.enqueued = time.perf_counter()
+        self.started: Optional[float] = None
+
+    def push(self, item: Any) -> None:
+        self.loop.call_soon_threadsafe(self.tokens.put_nowait, item)
+
+
+class SlotPool:
+    """
+    Decode slots sharing one GGUF file, fed from a bounded request queue.
+    Every slot is a separate llama.cpp context over the same mmapped weights,
+    so several summaries are decoded at the same time.
+    """
+
+    def __init__(
+        self,
+        model_path: str,
+        n_slots: int = 2,
+        threads_per_slot: Optional[int] = None,
+        max_queue: int = 32,
+        n_ctx: int = 16000,
+        enable_thinking: bool = False,
+        enable_few_shot_examples: bool = False,
+        cache_path: Optional[str] = None,
+    ):
+        """
+        Initialize SlotPool
+        Args:
+            model_path: str, path to GGUF model
+            n_slots: int, requests decoded concurrently
+            threads_per_slot: int, n_threads of every context (cpu_count / n_slots by default)
+            max_queue: int, waiting requests before new ones are rejected
+        """
+        self.model_path = model_path
+        self.n_slots = n_slots
+        self.jobs: queue.Queue[Job] = queue.Queue(maxsize=max_queue)
+        self.active = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        # Map steps of long documents, picked up by any free slot
+        self.chunks: queue.Queue[Tuple[str, Future]] = queue.Queue()
+        self.latencies: deque = deque(maxlen=1000)
+        self.queue_waits: deque = deque(maxlen=1000)
+        self._lock = threading.Lock()
+
+        threads = threads_per_slot or default_split(n_slots)
+        self.slots = [
+            QwenModel(
+                model_path=model_path,
+                enable_thinking=enable_thinking,
+                enable_few_shot_examples=enable_few_shot_examples,
+                n_ctx=n_ctx,
+                n_threads=threads,
+                cache_path=cache_path,
+                # Client system prompts are not snapshotted, so they can
+                # neither grow the prefix cache nor evict the server's own
+                prefix_prompts=(SYSTEM_PROMPT, CHUNK_PROMPT),
+            )
+            for _ in range(n_slots)
+        ]
+        for llm in self.slots:
+            llm.warm_prefix(SYSTEM_PROMPT)
+            threading.Thread(target=self._slot_loop, args=(llm,), daemon=True).start()
+
+    def submit(self, job: Job) -> None:
+        """
+        Queue a job, raising queue.Full when the queue is at capacity
+        """
+        try:
+            self.jobs.put_nowait(job)
+        except queue.Full:
+            with self._lock:
+                self.rejected += 1
+            REQUESTS.inc(outcome="rejected")
+            raise
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            latencies = sorted(self.latencies)
+            waits = sorted(self.queue_waits)
+            return {
+                "slots": self.n_slots,
+                "active": self.active,
+                "queue_depth": self.jobs.qsize(),
+                "queue_capacity": self.jobs.maxsize,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "latency_s_p50": _quantile(latencies, 0.5),
+                "latency_s_p90": _quantile(latencies, 0.9),
+                "queue_wait_s_p50": _quantile(waits, 0.5),
+                "queue_wait_s_p90": _quantile(waits, 0.9),
+            }
+
+    def map_chunks(
+        self,
+        llm: QwenModel,
+        chunks: List[str],
+        cancelled: Optional[threading.Event] = None,
+    ) -> List[str]:
+        """
+        Chunk notes of a long document, computed by every free slot in parallel.
+        The calling slot works through the queue as well, so the map step never
+        waits for a busy slot.
+        Raises:
+            JobCancelled: when cancelled is set; chunks not started are dropped
+        """
+        futures: List[Future] = []
+        for chunk in chunks:
+            futures.append(Future())
+            self.chunks.put((chunk, futures[-1]))
+        while not all(future.done() for future in futures):
+            if cancelled is not None and cancelled.is_set():
+                for future in futures:
+                    future.cancel()
+                raise JobCancelled()
+            try:
+                chunk, future = self.chunks.get_nowait()
+            except queue.Empty:
+                pending = [future for future in futures if not future.done()]
+                wait(pending, timeout=CHUNK_POLL_INTERVAL, return_when=FIRST_COMPLETED)
+                continue
+            self._run_chunk(llm, chunk, future)
+        return [future.result() for future in futures]
+
+    @staticmethod
+    def _run_chunk(llm: QwenModel, chunk: str, future: Future) -> None:
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(llm.run(CHUNK_PROMPT, chunk, stream=False))
+        except Exception as e:
+            future.set_exception(e)
+
+    def _slot_loop(self, llm: QwenModel) -> None:
+        while True:
+            try:
+                self._run_chunk(llm, *self.chunks.get_nowait())
+                continue
+            except queue.Empty:
+                pass
+            try:
+                job = self.jobs.get(timeout=CHUNK_POLL_INTERVAL)
+            except queue.Empty:
+                continue
+            if job.cancelled.is_set():
+                REQUESTS.inc(outcome="cancelled")
+                continue
+            job.started = time.perf_counter()
+            with self._lock:
+                self.active += 1
+                self.queue_waits.append(job.started - job.enqueued)
+            QUEUE_WAIT.observe(job.started - job.enqueued)
+            try:
+                if job.long_document:
+                    tokens = llm.run_long(
+                        job.system_prompt,
+                        job.article,
+                        stream=True,
+                        # Each slot summarizes its chunks with its own model
+                        map_fn=lambda _, chunks, llm=llm, job=job: self.map_chunks(
+                            llm, list(chunks), job.cancelled
+                        ),
+                    )
+                else:
+                    tokens = llm.run(job.system_prompt, job.article, stream=True)
+                for token in tokens:
+                    if job.cancelled.is_set():
+                        # Stop decoding, the partial answer is not cached
+                        getattr(tokens, "close", lambda: None)()
+                        break
+                    job.push(token)
+                job.push(None)
+                with self._lock:
+                    self.completed += 1
+                    self.latencies.append(time.perf_counter() - job.enqueued)
+                REQUESTS.inc(outcome="completed")
+                log_event(
+                    "server_request",
+                    id=job.id,
+                    long_document=job.long_document,
+                    queue_wait_s=round(job.started - job.enqueued, 3),
+                    seconds=round(time.perf_counter() - job.enqueued, 3),
+                    cancelled=job.cancelled.is_set(),
+                )
+            except JobCancelled:
+                job.push(None)
+                REQUESTS.inc(outcome="cancelled")
+                log_event("server_request", id=job.id, cancelled=True)
+            except Exception as e:
+                job.push(e)
+                with self._lock:
+                    self.failed += 1
+                REQUESTS.inc(outcome="failed")
+                log_event("server_request_failed", id=job.id, error=str(e))
+            finally:
+                with self._lock:
+                    self.active -= 1
+
+
+def _quantile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def _parse_messages(messages: List[Dict[str, str]]) -> tuple:
+    """
+    System prompt (SYSTEM_PROMPT unless given) and the last user message
+    """
+    system_prompt, article = SYSTEM_PROMPT, None
+    for message in messages:
+        if message.get("role") == "system":
+            system_prompt = message["content"]
+            if "{think_mode}" not in system_prompt:
+                # Plain client prompt, not a QwenModel template: keep braces literal
+                system_prompt = system_prompt.replace("{", "{{").replace("}", "}}")
+            try:
+                system_prompt.format(think_mode="", few_shot_examples="")
+            except (KeyError, IndexError, ValueError) as e:
+                raise HTTPException(
+                    400,
+                    "System prompt template may only use {think_mode} and "
+                    f"{{few_shot_examples}}, escape other braces as {{{{ }}}}: {e!r}",
+                ) from e
+        elif message.get("role") == "user":
+            article = message["content"]
+    if not article:
+        raise HTTPException(400, "A user message with the article is required")
+    return system_prompt, article
+
+
+def create_app(pool: SlotPool, model_name: str) -> FastAPI:
+    app = FastAPI(title="Financial News Summarizer")
+
+    @app.get("/health")
+    def health():
+        # "slow" (503) when the recent decode rate is below MIN_DECODE_TPS
+        status = inference_health()
+        stats = pool.stats()
+        status.update(queue_depth=stats["queue_depth"], active=stats["active"])
+        return JSONResponse(
+            status, status_code=200 if status["status"] == "ok" else 503
+        )
+
+    @app.get("/stats")
+    def stats():
+        return pool.stats()
+
+    @app.get("/metrics")
+    def metrics():
+        stats = pool.stats()
+        QUEUE_DEPTH.set(stats["queue_depth"])
+        ACTIVE_SLOTS.set(stats["active"])
+        return PlainTextResponse(render(), media_type="text/plain; version=0.0.4")
+
+    @app.get("/v1/models")
+    def models():
+        return {
+            "object": "list",
+            "data": [{"id": model_name, "object": "model", "owned_by": "local"}],
+        }
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        system_prompt, article = _parse_messages(body.get("messages", []))
+        job = Job(
+            system_prompt,
+            article,
+            bool(body.get("long_document", False)),
+            asyncio.get_running_loop(),
+        )
+        try:
+            pool.submit(job)
+        except queue.Full:
+            return JSONResponse(
+                {"error": {"message": "Request queue is full", "type": "overloaded"}},
+                status_code=429,
+                headers={"Retry-After": "5"},
+            )
+
+        created = int(time.time())
+        if body.get("stream"):
+            return StreamingResponse(
+                _sse(job, model_name, created, request), media_type="text/event-stream"
+            )
+
+        collector = asyncio.ensure_future(_collect(job))
+        watcher = asyncio.ensure_future(_wait_disconnect(request))
+        try:
+            await asyncio.wait(
+                (collector, watcher), return_when=asyncio.FIRST_COMPLETED
+            )
+        finally:
+            watcher.cancel()
+            disconnected = not collector.done()
+            if disconnected:
+                # Frees the slot (or skips the queued job) when the client goes away
+                collector.cancel()
+                job.cancelled.set()
+        if disconnected:
+            return Response(status_code=499)
+        content = collector.result()
+        return {
+            "id": job.id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model_name,
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }
+            ],
+        }
+
+    return app
+
+
+async def _collect(job: Job) -> str:
+    """
+    Whole answer of a non-streaming request
+    """
+    pieces = []
+    while True:
+        item = await job.tokens.get()
+        if item is None:
+            return "".join(pieces)
+        if isinstance(item, Exception):
+            raise HTTPException(500, str(item))
+        pieces.append(item)
+
+
+async def _wait_disconnect(request: Request) -> None:
+    while not await request.is_disconnected():
+        await asyncio.sleep(DISCONNECT_POLL_INTERVAL)
+
+
+async def _sse(job: Job, model_name: str, created: int, request: Request):
+    def chunk(delta: Dict[str, str], finish_reason: Optional[str] = None) -> str:
+        payload = {
+            "id": job.id,
+            "object": "chat.completion.chunk",
+            "created": created,
+            "model": model_name,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        }
+        return f"data: {json.dumps(payload)}\n\n"
+
+    try:
+        yield chunk({"role": "assistant"})
+        while True:
+            item = await job.tokens.get()
+            if item is None:
+                yield chunk({}, "stop")
+                break
+            if isinstance(item, Exception):
+                error = {"error": {"message": str(item), "type": "server_error"}}
+                yield f"data: {json.dumps(error)}\n\n"
+                break
+            yield chunk({"content": item})
+            if await request.is_disconnected():
+                break
+        yield "data: [DONE]\n\n"
+    finally:
+        # Frees the slot (or skips the queued job) when the client goes away
+        job.cancelled.set()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="OpenAI-compatible summarizer server")
+    parser.add_argument("--model-path", default="/app/data/models/Qwen3-1.7B-Q8_0.gguf")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--slots", type=int, default=2, help="concurrent decodes")
+    parser.add_argument("--threads", type=int, default=None, help="threads per slot")
+    parser.add_argument("--max-queue", type=int, default=32)
+    parser.add_argument("--n-ctx", type=int, default=16000)
+    parser.add_argument("--thinking", action="store_true")
+    parser.add_argument("--cache-path", default="/app/data/cache/summaries.sqlite")
+    args = parser.parse_args()
+
+    configure_logging()
+    maybe_start_profiler()
+    pool = SlotPool(
+        model_path=args.model_path,
+        n_slots=args.slots,
+        threads_per_slot=args.threads,
+        max_queue=args.max_queue,
+        n_ctx=args.n_ctx,
+        enable_thinking=args.thinking,
+        cache_path=args.cache_path or None,
+    )
+    app = create_app(pool, os.path.basename(args.model_path))
+    uvicorn.run(app, host=args.host, port=args.port)
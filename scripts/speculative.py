@@ -0,0 +1,118 @@
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+PROMPT_LOOKUP = "prompt_lookup"
+
+
+class GGUFDraftModel:
+    """
+    Draft model for llama-cpp-python speculative decoding backed by a small GGUF
+    (e.g. Qwen3-0.6B for Qwen3-1.7B, the vocabulary must match)
+    """
+
+    def __init__(
+        self,
+        model_path: str,
+        num_pred_tokens: int = 8,
+        n_ctx: int = 16000,
+        n_threads: int = 4,
+    ):
+        """
+        Initialize GGUFDraftModel
+        Args:
+            model_path: str, path to the draft GGUF model
+            num_pred_tokens: int, tokens drafted per step
+            n_ctx: int, context size (same as the target model)
+            n_threads: int, CPU threads of the draft context
+        """
+        from llama_cpp import Llama
+
+        self.num_pred_tokens = num_pred_tokens
+        self.llm = Llama(
+            model_path=model_path,
+            n_ctx=n_ctx,
+            n_threads=n_threads,
+            n_gpu_layers=-1,
+            verbose=False,
+        )
+
+    def __call__(self, input_ids: np.ndarray, /, **kwargs: Any) -> np.ndarray:
+        # generate() reuses the longest matching prefix, so only the tokens
+        # accepted since the previous step are evaluated
+        drafted: List[int] = []
+        for token in self.llm.generate(input_ids.tolist(), top_k=1, temp=0.0):
+            if token == self.llm.token_eos():
+                break
+            drafted.append(token)
+            if len(drafted) >= self.num_pred_tokens:
+                break
+        return np.array(drafted, dtype=np.intc)
+
+
+class DraftCounter:
+    """
+    Draft model wrapper counting drafted and accepted tokens.
+    llama-cpp-python keeps the accepted drafts plus one sampled token, so the
+    acceptance of a step is known from the prefix length of the next step.
+    """
+
+    def __init__(self, draft: Any):
+        self.draft = draft
+        self.total = {"steps": 0, "drafted": 0, "accepted": 0}
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Start counting a new completion
+        """
+        self.last = {"steps": 0, "drafted": 0, "accepted": 0}
+        self._pending: Optional[tuple] = None
+
+    def __call__(self, input_ids: np.ndarray, /, **kwargs: Any) -> np.ndarray:
+        if self._pending is not None:
+            prev_len, prev_drafted = self._pending
+            if len(input_ids) > prev_len:
+                self._count(
+                    prev_drafted, min(len(input_ids) - prev_len - 1, prev_drafted)
+                )
+
+        drafted = self.draft(input_ids, **kwargs)
+        self._pending = (len(input_ids), len(drafted))
+        return drafted
+
+    def stats(self, total: bool = False) -> Dict[str, float]:
+        """
+        Verified draft steps of the last completion (or of all completions)
+        """
+        counts = self.total if total else self.last
+        return {
+            **counts,
+            "acceptance_rate": (
+                counts["accepted"] / counts["drafted"] if counts["drafted"] else 0.0
+            ),
+        }
+
+    def _count(self, drafted: int, accepted: int) -> None:
+        for counts in (self.last, self.total):
+            counts["steps"] += 1
+            counts["drafted"] += drafted
+            counts["accepted"] += accepted
+
+
+def make_draft(
+    draft: str, num_pred_tokens: int = 10, n_ctx: int = 16000, n_threads: int = 4
+) -> DraftCounter:
+    """
+    Build a counted draft model
+    Args:
+        draft: str, "prompt_lookup" (n-gram drafting from the prompt) or a draft GGUF path
+        num_pred_tokens: int, tokens drafted per step
+    """
+    if draft == PROMPT_LOOKUP:
+        from llama_cpp.llama_speculative import LlamaPromptLookupDecoding
+
+        return DraftCounter(LlamaPromptLookupDecoding(num_pred_tokens=num_pred_tokens))
+    return DraftCounter(
+        GGUFDraftModel(draft, num_pred_tokens, n_ctx=n_ctx, n_threads=n_threads)
+    )
@@ -0,0 +1,80 @@
+import argparse
+import json
+import re
+import subprocess
+import sys
+from typing import Dict, List
+
+# Entry points whose import cost is paid on container start / Streamlit rerun
+DEFAULT_MODULES = [
+    "app",
+    "scripts.summarize_news",
+    "scripts.load_news",
+    "scripts.process_dataset",
+    "scripts.server",
+]
+
+IMPORTTIME_RE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( +)(\S+)")
+MARKER = "--startup-report--"
+
+
+def measure_import(module: str, python: str = sys.executable) -> Dict:
+    """
+    Cold import of a module in a fresh interpreter
+    Args:
+        module: str
+        python: str, interpreter to run
+    Returns:
+        dict: import seconds and the slowest imports it triggers
+    """
+    code = (
+        f"import sys, time; sys.stderr.write('{MARKER}\\n'); "
+        f"t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+    )
+    result = subprocess.run(
+        [python, "-X", "importtime", "-c", code], capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        last = result.stderr.strip().splitlines()[-1:] or ["unknown error"]
+        return {"module": module, "error": last[0]}
+
+    # Interpreter startup imports are logged before the marker
+    log = result.stderr.split(MARKER, 1)[-1]
+    parents = {module.rsplit(".", i)[0] for i in range(module.count(".") + 1)}
+    imports = [
+        (name, int(cumulative_us))
+        for _, cumulative_us, indent, name in IMPORTTIME_RE.findall(log)
+        # Top-level imports and their direct children
+        if len(indent) <= 3 and name not in parents
+    ]
+    heaviest = sorted(imports, key=lambda item: item[1], reverse=True)[:5]
+    return {
+        "module": module,
+        "import_s": float(result.stdout.strip().splitlines()[-1]),
+        "heaviest": [{"module": name, "s": us / 1e6} for name, us in heaviest],
+    }
+
+
+def report(modules: List[str]) -> List[Dict]:
+    rows = [measure_import(module) for module in modules]
+    for row in rows:
+        if "error" in row:
+            print(f"{row['module']:<28} failed: {row['error']}")
+            continue
+        heaviest = ", ".join(
+            f"{h['module']} {h['s']:.2f}s" for h in row["heaviest"][:3]
+        )
+        print(f"{row['module']:<28} {row['import_s']:6.2f}s  ({heaviest})")
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cold import time of entry points")
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--output", default=None, help="write JSON report")
+    args = parser.parse_args()
+
+    rows = report(args.modules)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
@@ -0,0 +1,146 @@
+import re
+from typing import Dict, List, Optional, Tuple
+
+# (attribute, label in the SYSTEM_PROMPT layout, key point bullet)
+FIELDS: List[Tuple[str, str, bool]] = [
+    ("headline", "Headline", False),
+    ("core_essence", "Core Essence", False),
+    ("event", "The Event", True),
+    ("financial_metrics", "Financial Metrics", True),
+    ("market_reaction", "Market Reaction", True),
+    ("key_quote", "Key Quote or Context", True),
+    ("outlook", "Outlook/Next Steps", True),
+]
+
+# Token budget of every field; the think budget only applies with /think
+DEFAULT_BUDGETS: Dict[str, int] = {
+    "think": 512,
+    "headline": 24,
+    "core_essence": 80,
+    "event": 60,
+    "financial_metrics": 160,
+    "market_reaction": 80,
+    "key_quote": 80,
+    "outlook": 80,
+}
+
+# Grammars bound characters, budgets are in tokens (~4 characters of English)
+CHARS_PER_TOKEN = 4
+
+
+class NewsSummary:
+    """
+    Headline / Core Essence / Key Points summary as a typed object
+    """
+
+    def __init__(
+        self,
+        headline: str,
+        core_essence: str,
+        event: str = "",
+        financial_metrics: str = "",
+        market_reaction: str = "",
+        key_quote: str = "",
+        outlook: str = "",
+        reasoning: str = "",
+    ):
+        self.headline = headline
+        self.core_essence = core_essence
+        self.event = event
+        self.financial_metrics = financial_metrics
+        self.market_reaction = market_reaction
+        self.key_quote = key_quote
+        self.outlook = outlook
+        # Content of the <think> block, kept out of the summary text
+        self.reasoning = reasoning
+
+    def __repr__(self) -> str:
+        return f"NewsSummary(headline={self.headline!r})"
+
+    def to_dict(self) -> Dict[str, str]:
+        return {name: getattr(self, name) for name, _, _ in FIELDS}
+
+    def to_text(self) -> str:
+        """
+        Render in the SYSTEM_PROMPT output layout (without reasoning)
+        """
+        lines = []
+        for name, label, bullet in FIELDS:
+            if bullet and lines[-1].startswith("Core Essence"):
+                lines.append("Key Points:")
+            lines.append(f"{'- ' if bullet else ''}{label}: {getattr(self, name)}")
+        return "\n".join(lines)
+
+    @classmethod
+    def from_text(cls, text: str) -> "NewsSummary":
+        """
+        Parse a summary in the SYSTEM_PROMPT layout (structured or free-form output)
+        Raises:
+            ValueError: if the headline or core essence is missing
+        """
+        reasoning = ""
+        think = re.search(r"<think>(.*?)(</think>|$)", text, re.DOTALL)
+        if think:
+            reasoning = think.group(1).strip()
+            text = text[think.end() :]
+
+        values: Dict[str, str] = {}
+        for line in text.splitlines():
+            line = line.strip().lstrip("-*").strip()
+            for name, label, _ in FIELDS:
+                # Markdown bold and "(1-2 sentences)" hints are tolerated
+                match = re.match(
+                    rf"\**{re.escape(label)}\**(\s*\([^)]*\))?\s*:\**\s*(.*)", line
+                )
+                if match and name not in values:
+                    values[name] = match.group(2).strip()
+                    break
+
+        if not values.get("headline") or not values.get("core_essence"):
+            raise ValueError("Summary has no Headline or Core Essence")
+        return cls(reasoning=reasoning, **values)
+
+
+def build_grammar(
+    budgets: Optional[Dict[str, int]] = None, thinking: bool = False
+) -> str:
+    """
+    GBNF grammar of the summary layout with per-field length limits.
+    Generation stops as soon as the last field ends.
+    Args:
+        budgets: dict, field -> tokens (DEFAULT_BUDGETS for missing fields)
+        thinking: bool, allow a bounded <think> block before the summary
+    Returns:
+        str: grammar for llama_cpp.LlamaGrammar.from_string
+    """
+    budgets = {**DEFAULT_BUDGETS, **(budgets or {})}
+    # Qwen3 opens every answer with a think block, empty under /no_think
+    if thinking:
+        reasoning = f"[^<]{{0,{budgets['think'] * CHARS_PER_TOKEN}}}"
+    else:
+        reasoning = "[\\n]{0,2}"
+    sequence = ["think"]
+    rules = [f'think ::= ("<think>" {reasoning} "</think>" [ \\n]{{0,2}})?']
+    for name, label, bullet in FIELDS:
+        if bullet and "key-points" not in sequence:
+            sequence.append("key-points")
+            rules.append('key-points ::= "Key Points:\\n"')
+        rule = name.replace("_", "-")
+        # Non-empty single line of at most budget * CHARS_PER_TOKEN characters
+        chars = max(budgets[name] * CHARS_PER_TOKEN - 1, 1)
+        prefix = "- " if bullet else ""
+        rules.append(f'{rule} ::= "{prefix}{label}: " [^\\n] [^\\n]{{0,{chars}}} "\\n"')
+        sequence.append(rule)
+    return "\n".join([f"root ::= {' '.join(sequence)}"] + rules)
+
+
+def token_limit(
+    budgets: Optional[Dict[str, int]] = None, thinking: bool = False
+) -> int:
+    """
+    max_tokens of the structured layout: labels included, with headroom for
+    digit-heavy fields (Qwen tokenizes every digit separately)
+    """
+    budgets = {**DEFAULT_BUDGETS, **(budgets or {})}
+    fields = sum(budgets[name] * 3 // 2 + 8 for name, _, _ in FIELDS)
+    return fields + 8 + (budgets["think"] if thinking else 8)
@@ -1,10 +1,60 @@
+import hashlib
 import os
-from typing import Iterator, Optional, Union
+import pickle
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
 
-from huggingface_hub import hf_hub_download
-from llama_cpp import Llama
+from prompts import CHUNK_PROMPT, FEW_SHOT_EXAMPLES, MERGE_PREFIX, SYSTEM_PROMPT
+from scripts.metrics import INFERENCE, RATE_BUCKETS, counter, histogram, log_event
+from scripts.summary_cache import SummaryCache, file_fingerprint, make_key
+from scripts.text_utils import chunk_text, strip_think
 
-from prompts import FEW_SHOT_EXAMPLES, SYSTEM_PROMPT
+if TYPE_CHECKING:
+    from llama_cpp import LlamaGrammar, LlamaState
+
+    from scripts.structured import NewsSummary
+
+IM_START = "<|im_start|>"
+IM_END = "<|im_end|>"
+# Logits buffer of a speculative context above which a warning is printed
+DRAFT_LOGITS_WARN_MB = 2048
+
+LLM_COMPLETIONS = counter(
+    "llm_completions_total", "Completions by mode", ["model", "mode"]
+)
+LLM_PROMPT_TOKENS = counter("llm_prompt_tokens_total", "Prompt tokens", ["model"])
+LLM_PREFILL_TOKENS = counter(
+    "llm_prefill_tokens_total",
+    "Prompt tokens evaluated (the reused prefix is not evaluated)",
+    ["model"],
+)
+LLM_GENERATED_TOKENS = counter(
+    "llm_generated_tokens_total", "Generated tokens", ["model"]
+)
+LLM_TTFT = histogram(
+    "llm_ttft_seconds",
+    "Time to first token (prefill time without streaming)",
+    ["model"],
+)
+LLM_DECODE_RATE = histogram(
+    "llm_decode_tokens_per_second", "Decode rate", ["model"], buckets=RATE_BUCKETS
+)
+LLM_SECONDS = histogram(
+    "llm_completion_seconds", "Completion latency", ["model", "mode"]
+)
 
 
 class QwenModel:
@@ -19,24 +69,65 @@ class QwenModel:
         model_path: Optional[str] = None,
         enable_thinking: bool = False,
         enable_few_shot_examples: bool = False,
+        reuse_prefix_cache: bool = True,
+        persist_prefix_cache: bool = False,
+        prefix_cache_size: int = 4,
+        prefix_prompts: Optional[Iterable[str]] = None,
+        n_ctx: int = 16000,
+        n_threads: int = 32,
+        n_batch: int = 512,
+        use_mmap: bool = True,
+        use_mlock: bool = False,
+        cache_path: Optional[str] = None,
+        draft: Optional[str] = None,
+        draft_tokens: int = 10,
+        draft_threads: int = 4,
     ):
         """
         Initialize QwenModel
+
+        Args:
+            reuse_prefix_cache: evaluate the static system prompt once and restore
+                the saved llama.cpp state before each article
+            persist_prefix_cache: store prefix states next to the GGUF file so a
+                restarted process starts warm
+            prefix_cache_size: system prompt states kept in memory (least recently
+                used evicted first, each holds a full llama.cpp state)
+            prefix_prompts: unformatted system prompts whose state is cached (all
+                by default); other prompts are evaluated without a snapshot
+            n_ctx: context size in tokens
+            n_threads: CPU threads used by this llama.cpp context
+            n_batch: prompt tokens evaluated per llama.cpp batch
+            use_mmap: map weights from the GGUF file, shared between contexts
+            use_mlock: pin mapped weights in RAM
+            cache_path: SQLite summary cache shared with other processes (disabled if None)
+            draft: speculative decoding with "prompt_lookup" (n-gram drafts copied
+                from the article) or a small draft GGUF path; needs logits of every
+                position, which llama-cpp-python keeps for the whole n_ctx
+            draft_tokens: tokens drafted per speculative step
+            draft_threads: CPU threads of a draft GGUF context
         """
         self.enable_thinking = enable_thinking
         self.enable_few_shot_examples = enable_few_shot_examples
+        self.reuse_prefix_cache = reuse_prefix_cache
+        self.persist_prefix_cache = persist_prefix_cache
+        self.prefix_cache_size = prefix_cache_size
+        self.prefix_prompts = None if prefix_prompts is None else set(prefix_prompts)
 
-        if not os.path.exists(model_path):
+        if not model_path or not os.path.exists(model_path):
             if model_name and filename:
+                from huggingface_hub import hf_hub_download
+
                 model_path = hf_hub_download(model_name, filename=filename)
             else:
                 raise ValueError(
                     "Model path are required for local inference. Otherwise fill model_name and filename to huggingface download"
                 )
+        self.model_path = model_path
 
         self.generation_kwargs = {
             "max_tokens": 4096,
-            "stop": ["<|im_end|>", "<|endoftext|>"],
+            "stop": [IM_END, "<|endoftext|>"],
             "temperature": 0.6,
             "top_p": 0.90,
             "top_k": 20,
@@ -44,76 +135,352 @@ class QwenModel:
             "presence_penalty": 1.5,
         }
 
+        # Imported here so that importing this module stays cheap
+        from llama_cpp import Llama
+
+        self.draft = None
+        if draft:
+            from scripts.speculative import make_draft
+
+            self.draft = make_draft(draft, draft_tokens, n_ctx, draft_threads)
+
         self.llm = Llama(
             model_path=model_path,
-            n_ctx=16000,
-            n_threads=32,
+            n_ctx=n_ctx,
+            n_threads=n_threads,
+            n_batch=n_batch,
+            use_mmap=use_mmap,
+            use_mlock=use_mlock,
             n_gpu_layers=-1,
-            no_perf=True,
+            draft_model=self.draft,
+            logits_all=self.draft is not None,
+            # llama.cpp prefill/decode timings feed the completion metrics
+            no_perf=False,
             verbose=False,
         )
+        if self.draft is not None:
+            # Verification keeps the logits of every position: n_ctx x vocab floats
+            logits_mb = n_ctx * self.llm.n_vocab() * 4 / (1024 * 1024)
+            log_event("draft_logits_buffer", n_ctx=n_ctx, mb=round(logits_mb))
+            if logits_mb > DRAFT_LOGITS_WARN_MB:
+                print(
+                    f"Warning: speculative decoding keeps {logits_mb / 1024:.1f} GB "
+                    f"of logits at n_ctx={n_ctx}; lower n_ctx (long mode splits "
+                    "articles that do not fit)"
+                )
+
+        self.cache = SummaryCache(cache_path) if cache_path else None
+        self.model_hash = file_fingerprint(model_path) if cache_path else None
+
+        # (prefix tokens, saved state) per formatted system prompt
+        self._prefix_cache: OrderedDict[str, Tuple[List[int], LlamaState]] = (
+            OrderedDict()
+        )
+        # Parsed GBNF grammars of the structured output mode
+        self._grammars: Dict[str, LlamaGrammar] = {}
 
     def run(
-        self, system_prompt: str, article: str, stream: bool = False
+        self,
+        system_prompt: str,
+        article: str,
+        stream: bool = False,
+        speculative: Optional[bool] = None,
     ) -> Union[str, Iterator[str]]:
         """
-        Run with system prompt using streaming
+        Run with system prompt, answering from the summary cache when possible
+        Args:
+            speculative: bool, use the draft model for this call (default: if configured)
         """
+        key = self.cache_key(system_prompt, article) if self.cache else None
+        cached = self.cache.get(key) if key else None
+        if cached is not None:
+            return iter([cached]) if stream else cached
+
         if stream:
-            return self.run_stream(system_prompt, article)
+            return self._store_stream(
+                key, self.run_stream(system_prompt, article, speculative)
+            )
         else:
-            return self.run_sync(system_prompt, article)
+            response = self.run_sync(system_prompt, article, speculative)
+            if key:
+                self.cache.put(key, response)
+            return response
 
-    def run_sync(self, system_prompt: str, article: str) -> str:
+    def run_long(
+        self,
+        system_prompt: str,
+        article: str,
+        stream: bool = False,
+        chunk_tokens: Optional[int] = None,
+        summarize_chunk: Optional[Callable[[str], str]] = None,
+        map_fn: Callable = map,
+    ) -> Union[str, Iterator[str]]:
         """
-        Run with system prompt without streaming
+        Map-reduce summarization for articles that do not fit the context.
+        Short articles take the single-pass path.
+        Args:
+            system_prompt: str, unformatted system prompt of the final summary
+            article: str
+            stream: bool, stream the final (reduce) step
+            chunk_tokens: int, token budget of a chunk (what fits the context by default)
+            summarize_chunk: callable, chunk -> notes (this model with CHUNK_PROMPT by
+                default); pass one backed by other workers to parallelize the map step
+            map_fn: callable, map applied to the chunks (e.g. ThreadPoolExecutor.map
+                together with summarize_chunk); this model is not thread-safe
         """
-        messages = [
-            {
-                "role": "system",
-                "content": system_prompt.format(
-                    think_mode="/think" if self.enable_thinking else "/no_think",
-                    few_shot_examples=(
-                        FEW_SHOT_EXAMPLES if self.enable_few_shot_examples else ""
-                    ),
-                ),
-            },
-            {"role": "user", "content": article},
-        ]
+        budget = self.article_token_budget(system_prompt)
+        article_tokens = self.count_tokens(article)
+        if article_tokens <= budget:
+            return self.run(system_prompt, article, stream=stream)
 
-        result = self.llm.create_chat_completion(
-            messages=messages, **self.generation_kwargs, stream=False
+        summarize_chunk = summarize_chunk or (
+            lambda chunk: self.run(CHUNK_PROMPT, chunk, stream=False)
         )
+        chunk_budget = min(
+            chunk_tokens or budget, self.article_token_budget(CHUNK_PROMPT)
+        )
+        chunks = chunk_text(article, self.count_tokens, chunk_budget)
+        notes = [strip_think(note) for note in map_fn(summarize_chunk, chunks)]
 
-        return result["choices"][0]["message"]["content"]
+        merged = MERGE_PREFIX + "\n\n".join(
+            f"Part {i}:\n{note}" for i, note in enumerate(notes, start=1)
+        )
+        merged_tokens = self.count_tokens(merged)
+        if merged_tokens > budget:
+            if merged_tokens >= article_tokens:
+                raise ValueError(
+                    "Chunk notes do not shrink the article, lower max_tokens"
+                )
+            # Notes of a very long filing still do not fit: reduce them again
+            return self.run_long(
+                system_prompt, merged, stream, chunk_tokens, summarize_chunk, map_fn
+            )
+        return self.run(system_prompt, merged, stream=stream)
 
-    def run_stream(self, system_prompt: str, article: str) -> Iterator[str]:
+    def run_structured(
+        self,
+        system_prompt: str,
+        article: str,
+        budgets: Optional[Dict[str, int]] = None,
+        speculative: Optional[bool] = None,
+    ) -> "NewsSummary":
         """
-        Run with system prompt using streaming
+        Grammar-constrained summary in the Headline/Core Essence/Key Points layout.
+        Every field is one line within its token budget, the think block is bounded
+        (empty under /no_think) and generation ends right after the last field.
+        Args:
+            system_prompt: str, unformatted system prompt
+            article: str
+            budgets: dict, field -> max tokens (see structured.DEFAULT_BUDGETS)
+        Returns:
+            NewsSummary: parsed fields, reasoning holds the think block
         """
-        messages = [
+        from scripts.structured import (
+            DEFAULT_BUDGETS,
+            NewsSummary,
+            build_grammar,
+            token_limit,
+        )
+
+        budgets = {**DEFAULT_BUDGETS, **(budgets or {})}
+        key = (
+            self.cache_key(system_prompt, article, structured=budgets)
+            if self.cache
+            else None
+        )
+        cached = self.cache.get(key) if key else None
+        if cached is not None:
+            return NewsSummary.from_text(cached)
+
+        grammar = build_grammar(budgets, self.enable_thinking)
+        if grammar not in self._grammars:
+            from llama_cpp import LlamaGrammar
+
+            self._grammars[grammar] = LlamaGrammar.from_string(grammar, verbose=False)
+
+        with self._speculation(speculative), self._observe("structured") as stats:
+            prompt = self._prepare_prompt(system_prompt, article)
+            stats["prompt_tokens"] = len(prompt)
+            result = self.llm.create_completion(
+                prompt=prompt,
+                **{
+                    **self.generation_kwargs,
+                    "max_tokens": token_limit(budgets, self.enable_thinking),
+                },
+                grammar=self._grammars[grammar],
+                stream=False,
+            )
+            stats["generated_tokens"] = result["usage"]["completion_tokens"]
+
+        text = result["choices"][0]["text"]
+        summary = NewsSummary.from_text(text)
+        if key:
+            self.cache.put(key, text)
+        return summary
+
+    def article_token_budget(self, system_prompt: str) -> int:
+        """
+        Article tokens that fit the context next to the prompt and the answer
+        """
+        prompt_tokens = len(
+            self._chatml_tokens("system", self.format_system_prompt(system_prompt))
+        )
+        # ChatML wrapping of the user and assistant turns
+        overhead = 16
+        budget = (
+            self.llm.n_ctx()
+            - prompt_tokens
+            - self.generation_kwargs["max_tokens"]
+            - overhead
+        )
+        if budget <= 0:
+            raise ValueError(
+                f"n_ctx={self.llm.n_ctx()} is too small for the prompt and max_tokens"
+            )
+        return budget
+
+    def cache_key(self, system_prompt: str, article: str, **extra: Any) -> str:
+        """
+        Summary cache key of an article under the current model settings
+        Args:
+            extra: other settings that change the output (e.g. structured budgets)
+        """
+        return make_key(
+            article,
+            self.model_hash,
+            system_prompt,
+            "/think" if self.enable_thinking else "/no_think",
             {
-                "role": "system",
-                "content": system_prompt.format(
-                    think_mode="/think" if self.enable_thinking else "/no_think",
-                    few_shot_examples=(
-                        FEW_SHOT_EXAMPLES if self.enable_few_shot_examples else ""
-                    ),
-                ),
+                **self.generation_kwargs,
+                "few_shot": self.enable_few_shot_examples,
+                **extra,
             },
-            {"role": "user", "content": article},
-        ]
-
-        result = self.llm.create_chat_completion(
-            messages=messages, **self.generation_kwargs, stream=True
         )
 
-        for chunk in result:
-            if chunk["choices"][0]["finish_reason"] is not None:
-                break
-            token = chunk["choices"][0]["delta"].get("content", "")
-            if token:
-                yield token
+    def _store_stream(self, key: Optional[str], tokens: Iterator[str]) -> Iterator[str]:
+        """
+        Pass tokens through and cache the full response once the stream completes
+        """
+        collected = []
+        for token in tokens:
+            collected.append(token)
+            yield token
+        if key:
+            self.cache.put(key, "".join(collected))
+
+    def run_sync(
+        self, system_prompt: str, article: str, speculative: Optional[bool] = None
+    ) -> str:
+        """
+        Run with system prompt without streaming
+        """
+        with self._speculation(speculative), self._observe("sync") as stats:
+            prompt = self._prepare_prompt(system_prompt, article)
+            stats["prompt_tokens"] = len(prompt)
+            result = self.llm.create_completion(
+                prompt=prompt,
+                **self.generation_kwargs,
+                stream=False,
+            )
+            stats["generated_tokens"] = result["usage"]["completion_tokens"]
+
+        return result["choices"][0]["text"]
+
+    def run_stream(
+        self, system_prompt: str, article: str, speculative: Optional[bool] = None
+    ) -> Iterator[str]:
+        """
+        Run with system prompt using streaming
+        """
+        with self._speculation(speculative), self._observe("stream") as stats:
+            prompt = self._prepare_prompt(system_prompt, article)
+            stats["prompt_tokens"] = len(prompt)
+            result = self.llm.create_completion(
+                prompt=prompt,
+                **self.generation_kwargs,
+                stream=True,
+            )
+
+            for chunk in result:
+                if stats["ttft_s"] is None:
+                    stats["ttft_s"] = time.perf_counter() - stats["start"]
+                stats["generated_tokens"] += 1
+                token = chunk["choices"][0]["text"]
+                if token:
+                    yield token
+                if chunk["choices"][0]["finish_reason"] is not None:
+                    break
+
+    def speculative_stats(self, total: bool = False) -> Dict[str, Any]:
+        """
+        Drafted/accepted tokens and acceptance rate of the last speculative call
+        (or of all calls), empty without a draft model
+        """
+        return self.draft.stats(total) if self.draft else {}
+
+    @contextmanager
+    def _observe(self, mode: str) -> Iterator[Dict[str, Any]]:
+        """
+        Record tokens, time to first token and decode rate of one completion
+        (also when a stream is closed early)
+        """
+        from llama_cpp import llama_perf_context, llama_perf_context_reset
+
+        llama_perf_context_reset(self.llm.ctx)
+        stats = {
+            "start": time.perf_counter(),
+            "prompt_tokens": 0,
+            "generated_tokens": 0,
+            "ttft_s": None,
+        }
+        try:
+            yield stats
+        finally:
+            seconds = time.perf_counter() - stats["start"]
+            perf = llama_perf_context(self.llm.ctx)
+            decode_s = perf.t_eval_ms / 1000
+            decode_tps = (
+                perf.n_eval / decode_s if perf.n_eval and decode_s > 0 else None
+            )
+            if stats["ttft_s"] is None:
+                stats["ttft_s"] = perf.t_p_eval_ms / 1000
+
+            model = os.path.basename(self.model_path)
+            LLM_COMPLETIONS.inc(model=model, mode=mode)
+            LLM_PROMPT_TOKENS.inc(stats["prompt_tokens"], model=model)
+            LLM_PREFILL_TOKENS.inc(perf.n_p_eval, model=model)
+            LLM_GENERATED_TOKENS.inc(stats["generated_tokens"], model=model)
+            LLM_TTFT.observe(stats["ttft_s"], model=model)
+            if decode_tps:
+                LLM_DECODE_RATE.observe(decode_tps, model=model)
+            LLM_SECONDS.observe(seconds, model=model, mode=mode)
+            INFERENCE.add(seconds, decode_tps)
+            log_event(
+                "llm_completion",
+                model=model,
+                mode=mode,
+                prompt_tokens=stats["prompt_tokens"],
+                prefill_tokens=perf.n_p_eval,
+                generated_tokens=stats["generated_tokens"],
+                ttft_s=round(stats["ttft_s"], 3),
+                decode_tps=round(decode_tps, 2) if decode_tps else None,
+                seconds=round(seconds, 3),
+                **({"speculative": self.draft.stats()} if self.llm.draft_model else {}),
+            )
+
+    @contextmanager
+    def _speculation(self, speculative: Optional[bool]) -> Iterator[None]:
+        """
+        Attach the draft model for one completion
+        """
+        enabled = self.draft is not None and speculative is not False
+        if enabled:
+            self.draft.reset()
+        self.llm.draft_model = self.draft if enabled else None
+        try:
+            yield
+        finally:
+            self.llm.draft_model = self.draft
 
     def count_tokens(self, text: str) -> int:
         """
@@ -129,6 +496,132 @@ class QwenModel:
         tokens = self.llm.tokenize(text.encode("utf-8"))
         return tokens
 
+    def format_system_prompt(self, system_prompt: str) -> str:
+        """
+        Fill think mode and few-shot placeholders of the system prompt
+        """
+        return system_prompt.format(
+            think_mode="/think" if self.enable_thinking else "/no_think",
+            few_shot_examples=(
+                FEW_SHOT_EXAMPLES if self.enable_few_shot_examples else ""
+            ),
+        )
+
+    def warm_prefix(self, system_prompt: str = SYSTEM_PROMPT) -> List[int]:
+        """
+        Evaluate the static system prompt prefix once and keep its llama.cpp state
+        Args:
+            system_prompt: str, unformatted system prompt
+        Returns:
+            list: prefix tokens
+        """
+        return self._prefix_entry(system_prompt)[0]
+
+    def _prefix_entry(self, system_prompt: str) -> Tuple[List[int], "LlamaState"]:
+        """
+        Get (tokens, state) of the formatted system prompt, evaluating it on miss
+        """
+        content = self.format_system_prompt(system_prompt)
+        key = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        if key not in self._prefix_cache:
+            tokens = self._chatml_tokens("system", content)
+            state = self._load_prefix_state(key, tokens)
+            if state is None:
+                self.llm.reset()
+                self.llm.eval(tokens)
+                state = self.llm.save_state()
+                self._save_prefix_state(key, state)
+            self._prefix_cache[key] = (tokens, state)
+            while len(self._prefix_cache) > max(self.prefix_cache_size, 1):
+                self._prefix_cache.popitem(last=False)
+        else:
+            self._prefix_cache.move_to_end(key)
+
+        return self._prefix_cache[key]
+
+    def _prepare_prompt(self, system_prompt: str, article: str) -> List[int]:
+        """
+        Build ChatML prompt tokens, restoring the cached prefix state if needed
+        """
+        suffix = self._chatml_tokens("user", article) + self.llm.tokenize(
+            f"{IM_START}assistant\n".encode(), add_bos=False, special=True
+        )
+
+        if not self.reuse_prefix_cache or (
+            self.prefix_prompts is not None and system_prompt not in self.prefix_prompts
+        ):
+            return (
+                self._chatml_tokens("system", self.format_system_prompt(system_prompt))
+                + suffix
+            )
+
+        prefix, state = self._prefix_entry(system_prompt)
+        # llama.cpp reuses the longest matching token prefix on its own,
+        # so the snapshot is only restored when another variant was evaluated.
+        # input_ids is the whole n_ctx buffer, only n_tokens of it are valid.
+        evaluated = list(self.llm.input_ids[: self.llm.n_tokens])
+        if evaluated[: len(prefix)] != list(prefix):
+            self.llm.load_state(state)
+
+        return prefix + suffix
+
+    def _chatml_tokens(self, role: str, content: str) -> List[int]:
+        """
+        Tokenize a single ChatML message
+        """
+        return self.llm.tokenize(
+            f"{IM_START}{role}\n{content}{IM_END}\n".encode(),
+            add_bos=False,
+            special=True,
+        )
+
+    def _prefix_state_path(self, key: str) -> str:
+        """
+        Snapshot path next to the GGUF file
+        """
+        # Speculative contexts also snapshot the logits of every prefix token
+        logits = "-logits" if self.draft else ""
+        return f"{self.model_path}.prefix-{key[:16]}-{self.llm.n_ctx()}{logits}.state"
+
+    def _load_prefix_state(self, key: str, tokens: List[int]) -> Optional["LlamaState"]:
+        """
+        Load persisted prefix state if it matches the current model and tokens
+        """
+        if not self.persist_prefix_cache:
+            return None
+
+        path = self._prefix_state_path(key)
+        if not os.path.exists(path) or os.path.getmtime(path) < os.path.getmtime(
+            self.model_path
+        ):
+            return None
+
+        try:
+            with open(path, "rb") as f:
+                state = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError) as e:
+            print(f"Error loading prefix state {path}: {e}")
+            return None
+
+        if list(state.input_ids[: state.n_tokens]) != list(tokens):
+            return None
+        return state
+
+    def _save_prefix_state(self, key: str, state: "LlamaState") -> None:
+        """
+        Persist prefix state next to the GGUF file
+        """
+        if not self.persist_prefix_cache:
+            return
+
+        path = self._prefix_state_path(key)
+        try:
+            with open(f"{path}.tmp", "wb") as f:
+                pickle.dump(state, f)
+            os.replace(f"{path}.tmp", path)
+        except OSError as e:
+            print(f"Error saving prefix state {path}: {e}")
+
 
 if __name__ == "__main__":
     model_path = "/app/data/models/Qwen3-1.7B-Q8_0.gguf"  # Docker
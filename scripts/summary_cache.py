@@ -0,0 +1,210 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+_fingerprints: Dict[str, str] = {}
+
+# Seconds between SQLite access time updates of an entry served from memory
+TOUCH_INTERVAL = 60
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize article text so that syndicated copies hash the same
+    """
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def file_fingerprint(path: str, sample_bytes: int = 1 << 20) -> str:
+    """
+    Cheap model file hash: size, mtime and the first/last megabyte
+    Args:
+        path: str
+        sample_bytes: int, bytes hashed from each end of the file
+    Returns:
+        str: hex digest
+    """
+    stat = os.stat(path)
+    cache_key = f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+    if cache_key not in _fingerprints:
+        h = hashlib.sha256(f"{stat.st_size}".encode())
+        with open(path, "rb") as f:
+            h.update(f.read(sample_bytes))
+            if stat.st_size > sample_bytes:
+                f.seek(max(sample_bytes, stat.st_size - sample_bytes))
+                h.update(f.read(sample_bytes))
+        _fingerprints[cache_key] = h.hexdigest()
+    return _fingerprints[cache_key]
+
+
+def make_key(
+    article: str,
+    model_hash: str,
+    system_prompt: str,
+    think_mode: str,
+    generation_kwargs: Dict[str, Any],
+) -> str:
+    """
+    Content-addressed cache key of a summary request
+    """
+    payload = json.dumps(
+        {
+            "article": hashlib.sha256(normalize_text(article).encode()).hexdigest(),
+            "model": model_hash,
+            "prompt": hashlib.sha256(system_prompt.encode()).hexdigest(),
+            "think_mode": think_mode,
+            "generation": generation_kwargs,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class SummaryCache:
+    """
+    Persistent summary cache: SQLite on disk with an in-process LRU in front
+    """
+
+    def __init__(
+        self,
+        path: str = "data/cache/summaries.sqlite",
+        max_bytes: int = 512 * 1024 * 1024,
+        lru_size: int = 1024,
+    ):
+        """
+        Initialize SummaryCache
+        Args:
+            path: str, SQLite file, shared between processes
+            max_bytes: int, total size of stored summaries before eviction
+            lru_size: int, entries kept in memory
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.lru_size = lru_size
+        self.hits = 0
+        self.misses = 0
+        # key -> (summary, last access time written to SQLite)
+        self._lru: OrderedDict[str, Tuple[str, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS summaries ("
+            "key TEXT PRIMARY KEY, summary TEXT NOT NULL, size INTEGER NOT NULL, "
+            "accessed REAL NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS summaries_accessed ON summaries (accessed)"
+        )
+        self._db.commit()
+        # Approximate running total; recomputed before evicting since other
+        # processes may write to the same file
+        (self._total,) = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM summaries"
+        ).fetchone()
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Cached summary or None
+        """
+        with self._lock:
+            if key in self._lru:
+                summary, touched = self._lru[key]
+                # Keeps hot entries from being evicted first on disk
+                if time.time() - touched > TOUCH_INTERVAL:
+                    touched = self._touch(key)
+                self._remember(key, summary, touched)
+                self.hits += 1
+                return summary
+
+            row = self._db.execute(
+                "SELECT summary FROM summaries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            self._remember(key, row[0], self._touch(key))
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, summary: str) -> None:
+        """
+        Store summary and evict least recently used entries over max_bytes
+        """
+        size = len(summary.encode("utf-8"))
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO summaries (key, summary, size, accessed) "
+                "VALUES (?, ?, ?, ?)",
+                (key, summary, size, time.time()),
+            )
+            self._total += size
+            if self._total > self.max_bytes:
+                self._evict()
+            self._db.commit()
+            self._remember(key, summary, time.time())
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Hit/miss counters and store size
+        """
+        with self._lock:
+            entries, total = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM summaries"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "bytes": total,
+        }
+
+    def close(self) -> None:
+        self._db.close()
+
+    def _touch(self, key: str) -> float:
+        """
+        Write the access time of an entry, returns it
+        """
+        now = time.time()
+        self._db.execute("UPDATE summaries SET accessed = ? WHERE key = ?", (now, key))
+        self._db.commit()
+        return now
+
+    def _remember(self, key: str, summary: str, touched: float) -> None:
+        self._lru[key] = (summary, touched)
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.lru_size:
+            self._lru.popitem(last=False)
+
+    def _evict(self) -> None:
+        (total,) = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM summaries"
+        ).fetchone()
+        self._total = total
+        if total <= self.max_bytes:
+            return
+
+        # Drop oldest entries until 90% of the budget is used
+        excess = total - int(self.max_bytes * 0.9)
+        freed = 0
+        for key, size in self._db.execute(
+            "SELECT key, size FROM summaries ORDER BY accessed"
+        ).fetchall():
+            if freed >= excess:
+                break
+            self._db.execute("DELETE FROM summaries WHERE key = ?", (key,))
+            self._lru.pop(key, None)
+            freed += size
+        self._total -= freed
@@ -0,0 +1,74 @@
+import re
+from typing import Callable, List
+
+THINK_RE = re.compile(r"<think>.*?</think>\s*", re.DOTALL)
+PARAGRAPH_RE = re.compile(r"\n\s*\n")
+# Sentence end followed by whitespace and an upper-case letter, digit or quote
+SENTENCE_RE = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9\"'(])")
+
+
+def strip_think(text: str) -> str:
+    """
+    Remove <think>...</think> blocks (including an unterminated trailing one)
+    """
+    text = THINK_RE.sub("", text)
+    if "<think>" in text:
+        text = text[: text.index("<think>")]
+    return text.strip()
+
+
+def split_paragraphs(text: str) -> List[str]:
+    """
+    Split text on blank lines, dropping empty paragraphs
+    """
+    return [p.strip() for p in PARAGRAPH_RE.split(text) if p.strip()]
+
+
+def split_sentences(text: str) -> List[str]:
+    """
+    Split text into sentences with a light regex
+    """
+    return [s.strip() for s in SENTENCE_RE.split(text) if s.strip()]
+
+
+def chunk_text(
+    text: str, count_tokens: Callable[[str], int], max_tokens: int
+) -> List[str]:
+    """
+    Split text into chunks of at most max_tokens, cutting at paragraph and then
+    sentence boundaries (words only for a single oversized sentence)
+    Args:
+        text: str
+        count_tokens: callable, text -> number of tokens
+        max_tokens: int, token budget of a chunk
+    Returns:
+        list: chunks in text order
+    """
+    pieces = []
+    for paragraph in split_paragraphs(text):
+        if count_tokens(paragraph) <= max_tokens:
+            pieces.append(paragraph)
+            continue
+        for sentence in split_sentences(paragraph):
+            if count_tokens(sentence) <= max_tokens:
+                pieces.append(sentence)
+                continue
+            words = sentence.split()
+            # Words per piece from the average tokens per word of this sentence
+            step = max(1, len(words) * max_tokens // count_tokens(sentence))
+            pieces.extend(
+                " ".join(words[i : i + step]) for i in range(0, len(words), step)
+            )
+
+    chunks, current, current_tokens = [], [], 0
+    for piece in pieces:
+        # +1 approximates the separator between pieces
+        piece_tokens = count_tokens(piece) + 1
+        if current and current_tokens + piece_tokens > max_tokens:
+            chunks.append("\n\n".join(current))
+            current, current_tokens = [], 0
+        current.append(piece)
+        current_tokens += piece_tokens
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
@@ -0,0 +1,66 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable
+
+import pytest
+
+
+class LocalServer:
+    """
+    Threaded HTTP server on a free local port answering GET and POST with a
+    test's handler, counting requests and requests in flight
+    """
+
+    def __init__(self, handle: Callable[[BaseHTTPRequestHandler], None]):
+        self.requests = 0
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server._enter()
+                try:
+                    handle(self)
+                finally:
+                    server._leave()
+
+            do_POST = do_GET
+
+            def log_message(self, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self._httpd.server_address[1]}"
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+
+    def close(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def _enter(self) -> None:
+        with self._lock:
+            self.requests += 1
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+
+    def _leave(self) -> None:
+        with self._lock:
+            self.active -= 1
+
+
+@pytest.fixture
+def local_server():
+    """
+    Factory starting a LocalServer per handler, all shut down after the test
+    """
+    servers = []
+
+    def start(handle: Callable[[BaseHTTPRequestHandler], None]) -> LocalServer:
+        servers.append(LocalServer(handle))
+        return servers[-1]
+
+    yield start
+    for server in servers:
+        server.close()
@@ -0,0 +1,151 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+from openai import BadRequestError, InternalServerError
+
+from scripts.async_labeler import AsyncLabeler
+from scripts.pipeline import JsonlCheckpoint
+
+ARTICLE = "Apple (AAPL) shares rose 3% after earnings"
+
+
+class MockAPI:
+    """
+    OpenAI-compatible chat endpoint answering from a script of responses
+    """
+
+    def __init__(self, script=(), delay=0.0):
+        # Responses of the first requests ("ok", "broken" or a status code),
+        # "ok" afterwards
+        self.script = list(script)
+        self.delay = delay
+        self.lock = threading.Lock()
+
+    def next_response(self):
+        with self.lock:
+            return self.script.pop(0) if self.script else "ok"
+
+    def handle(self, request):
+        body = json.loads(request.rfile.read(int(request.headers["Content-Length"])))
+        article = body["messages"][-1]["content"]
+        response = self.next_response()
+        time.sleep(self.delay)
+        if isinstance(response, int):
+            payload = json.dumps({"error": {"message": "busy"}}).encode()
+            request.send_response(response)
+            request.send_header("Content-Type", "application/json")
+            request.send_header("Content-Length", str(len(payload)))
+            request.end_headers()
+            request.wfile.write(payload)
+            return
+
+        events = list(_events(article))
+        request.send_response(200)
+        request.send_header("Content-Type", "text/event-stream")
+        if response == "broken":
+            # Promise more than is sent, then drop the connection
+            request.send_header("Content-Length", "100000")
+            request.end_headers()
+            request.wfile.write(events[0])
+            request.wfile.flush()
+            request.close_connection = True
+            return
+        request.end_headers()
+        for event in events:
+            request.wfile.write(event)
+            request.wfile.flush()
+
+
+def _events(article):
+    chunks = [
+        {"reasoning_content": "thinking"},
+        {"content": "Headline: "},
+        {"content": article},
+    ]
+    for delta in chunks:
+        chunk = {
+            "id": "chatcmpl-test",
+            "object": "chat.completion.chunk",
+            "created": 0,
+            "model": "mock",
+            "choices": [{"index": 0, "delta": delta, "finish_reason": None}],
+        }
+        yield f"data: {json.dumps(chunk)}\n\n".encode()
+    yield b"data: [DONE]\n\n"
+
+
+@pytest.fixture
+def mock_api(local_server):
+    api = MockAPI()
+    api.server = local_server(api.handle)
+    api.base_url = f"{api.server.url}/v1"
+    return api
+
+
+async def label(labeler, article):
+    try:
+        return await labeler.label(article)
+    finally:
+        await labeler.http_client.aclose()
+
+
+def make_labeler(api, **kwargs):
+    return AsyncLabeler(
+        base_url=api.base_url,
+        api_key="test",
+        model="mock",
+        requests_per_minute=60000,
+        backoff_base=0.01,
+        timeout=10,
+        **kwargs,
+    )
+
+
+def test_label_retries_status_errors(mock_api):
+    mock_api.script = [429, 503]
+    labeler = make_labeler(mock_api)
+
+    assert asyncio.run(label(labeler, ARTICLE)) == ("thinking", f"Headline: {ARTICLE}")
+    assert mock_api.server.requests == 3
+
+
+def test_label_gives_up_after_max_retries(mock_api):
+    mock_api.script = [500, 500, 500]
+    labeler = make_labeler(mock_api, max_retries=2)
+
+    with pytest.raises(InternalServerError):
+        asyncio.run(label(labeler, ARTICLE))
+    assert mock_api.server.requests == 3
+
+
+def test_label_does_not_retry_client_errors(mock_api):
+    mock_api.script = [400]
+    labeler = make_labeler(mock_api)
+
+    with pytest.raises(BadRequestError):
+        asyncio.run(label(labeler, ARTICLE))
+    assert mock_api.server.requests == 1
+
+
+def test_label_retries_stream_broken_midway(mock_api):
+    mock_api.script = ["broken"]
+    labeler = make_labeler(mock_api)
+
+    assert asyncio.run(label(labeler, ARTICLE)) == ("thinking", f"Headline: {ARTICLE}")
+    assert mock_api.server.requests == 2
+
+
+def test_run_bounds_concurrency(mock_api, tmp_path):
+    mock_api.delay = 0.1
+    labeler = make_labeler(mock_api, max_concurrency=2)
+    items = [(str(i), f"article {i}") for i in range(6)]
+
+    with JsonlCheckpoint(str(tmp_path / "labels.jsonl")) as checkpoint:
+        failed = asyncio.run(labeler.run(items, checkpoint, total=len(items)))
+
+    assert failed == 0
+    assert checkpoint.done_keys() == {key for key, _ in items}
+    assert mock_api.server.max_active == 2
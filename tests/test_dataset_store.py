@@ -0,0 +1,92 @@
+import pandas as pd
+import pytest
+
+from scripts.dataset_store import DatasetStore, article_id, convert_csv
+from scripts.pipeline import JsonlCheckpoint, export_store, iter_articles, store_column
+
+
+@pytest.fixture
+def store(tmp_path):
+    pd.DataFrame(
+        {
+            "article": ["Tesla shares rose", "Apple shares fell", None],
+            "ground_truth": ["Tesla up", None, "orphan"],
+            "prediction": ["Tesla rose", "Apple fell", "orphan"],
+        }
+    ).to_csv(tmp_path / "ready.csv", index=False)
+    store = DatasetStore(str(tmp_path / "store"))
+    assert convert_csv(
+        str(tmp_path / "ready.csv"), store, rename={"prediction": "prediction_a"}
+    ) == (2, ["ground_truth", "prediction_a"])
+    return store
+
+
+def test_read_joins_predictions(store):
+    df = store.read(["article", "ground_truth", "prediction_a"])
+
+    assert df.columns.tolist() == [
+        "article_id",
+        "article",
+        "ground_truth",
+        "prediction_a",
+    ]
+    assert df["article_id"].tolist() == [
+        article_id("Tesla shares rose"),
+        article_id("Apple shares fell"),
+    ]
+    assert df["ground_truth"].tolist()[0] == "Tesla up"
+    assert df["ground_truth"].isna().tolist() == [False, True]
+    assert df["prediction_a"].tolist() == ["Tesla rose", "Apple fell"]
+    with pytest.raises(KeyError):
+        store.read(["missing"])
+
+
+def test_same_article_is_stored_once(store, tmp_path):
+    pd.DataFrame({"extracted_text": ["Tesla  shares rose", "Ford cut prices"]}).to_csv(
+        tmp_path / "news.csv", index=False
+    )
+
+    new, names = convert_csv(str(tmp_path / "news.csv"), store, "extracted_text")
+
+    assert (new, names) == (1, [])
+    df = store.read()
+    assert len(df) == 3
+    # Parts with different fields are read together, missing fields are null
+    assert df["article"].isna().tolist() == [False, False, True]
+    assert df["prediction_a"].isna().tolist() == [False, False, True]
+
+
+def test_write_predictions_merges(store):
+    tesla, apple = article_id("Tesla shares rose"), article_id("Apple shares fell")
+    store.write_predictions("prediction_a", {apple: "Apple slid"})
+
+    assert store.read(["prediction_a"])["prediction_a"].tolist() == [
+        "Tesla rose",
+        "Apple slid",
+    ]
+    assert store.prediction_names() == ["ground_truth", "prediction_a"]
+    assert list(store.iter_articles(skip_keys={tesla})) == [
+        (apple, "Apple shares fell")
+    ]
+
+
+def test_export_store_from_checkpoint(store, tmp_path):
+    checkpoint_path = str(tmp_path / "out.jsonl")
+    with JsonlCheckpoint(checkpoint_path) as checkpoint:
+        for key, article in iter_articles(store.root):
+            checkpoint.append(key, {"prediction": article.upper()})
+
+    column = store_column("few_shot_dataset_by_qwen.csv", "prediction")
+    export_store(store.root, checkpoint_path, {"prediction": column})
+
+    assert column == "prediction_few_shot_dataset_by_qwen"
+    assert store.read([column])[column].tolist() == [
+        "TESLA SHARES ROSE",
+        "APPLE SHARES FELL",
+    ]
+
+
+def test_export_store_without_checkpoint(store, tmp_path):
+    export_store(store.root, str(tmp_path / "missing.jsonl"), {"prediction": "x"})
+
+    assert "x" not in store.prediction_names()
@@ -0,0 +1,73 @@
+import random
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("rouge_score")
+from rouge_score import rouge_scorer  # noqa: E402
+
+from scripts.evaluate_summaries import Evaluator, rouge_rows, rouge_tokens  # noqa: E402
+
+ROUGE_TYPES = ["rouge1", "rouge2", "rougeL", "rougeLsum"]
+# Small vocabulary so that LCS ties are frequent
+VOCABULARY = (
+    "tesla shares rose fell revenue quarter profit beat analysts the a of".split()
+)
+
+
+def random_summary(rng: random.Random) -> str:
+    lines = []
+    for _ in range(rng.randint(1, 4)):
+        lines.append(" ".join(rng.choices(VOCABULARY, k=rng.randint(1, 12))))
+    return "\n".join(lines)
+
+
+@pytest.mark.parametrize("use_stemmer", [False, True])
+def test_rouge_matches_rouge_score(use_stemmer):
+    rng = random.Random(0)
+    scorer = rouge_scorer.RougeScorer(ROUGE_TYPES, use_stemmer=use_stemmer)
+    for _ in range(2000):
+        reference, prediction = random_summary(rng), random_summary(rng)
+        expected = scorer.score(reference, prediction)
+        (row,) = rouge_rows(
+            [
+                (
+                    rouge_tokens(reference, use_stemmer),
+                    rouge_tokens(prediction, use_stemmer),
+                )
+            ]
+        )
+        for rouge_type in ROUGE_TYPES:
+            assert row[rouge_type] == pytest.approx(expected[rouge_type].fmeasure), (
+                rouge_type,
+                reference,
+                prediction,
+            )
+
+
+def test_stemming_is_off_by_default():
+    scores = Evaluator(metrics=["rouge"], workers=1, cache_dir=None).score(
+        ["Shares rose on profits"], ["Share rising on profit"]
+    )
+    scorer = rouge_scorer.RougeScorer(["rouge1"], use_stemmer=False)
+    expected = scorer.score("Shares rose on profits", "Share rising on profit")
+    assert scores["rouge1"][0] == pytest.approx(expected["rouge1"].fmeasure)
+
+
+def test_missing_rows_are_not_scored():
+    df = pd.DataFrame(
+        {
+            "ground_truth": ["Shares rose", None, "Revenue beat", "Profit fell"],
+            "prediction_a": ["Shares rose", "Shares rose", None, "Profit fell"],
+            "prediction_b": [None, None, "Revenue beat", None],
+        }
+    )
+    evaluator = Evaluator(metrics=["rouge"], workers=1, cache_dir=None)
+
+    per_row, summary = evaluator.evaluate(df)
+
+    assert summary.loc["prediction_a", "n_scored"] == 2
+    assert summary.loc["prediction_a", "rouge1"] == pytest.approx(1.0)
+    assert summary.loc["prediction_b", "n_scored"] == 1
+    assert summary.loc["prediction_b", "rouge1"] == pytest.approx(1.0)
+    assert per_row["prediction_a_rouge1"].isna().tolist() == [False, True, True, False]
@@ -0,0 +1,38 @@
+from scripts.extractive import approx_tokens, compress, split_article, truncate
+
+ARTICLE = (
+    "Tesla Inc. (NASDAQ: TSLA) shares rose 7% after quarterly revenue beat "
+    "estimates. Revenue grew to $25.2 billion from $23.4 billion a year earlier. "
+    "The weather in Austin was mild on Tuesday. "
+    "Zacks Rank #3 (Hold) stocks are worth a look, see the full list here."
+)
+
+
+def test_compress_keeps_informative_sentences_within_budget():
+    compressed = compress(ARTICLE, 40)
+
+    assert approx_tokens(compressed) <= 40
+    assert "shares rose 7%" in compressed
+    assert "see the full list" not in compressed
+
+
+def test_compress_short_article_is_unchanged():
+    text = "Apple shares rose 3% after earnings beat estimates."
+    assert compress(text, 512) == text
+
+
+def test_compress_never_returns_empty():
+    compressed = compress("Word " * 3000, 100)
+
+    assert compressed.startswith("Word Word")
+    assert approx_tokens(compressed) <= 100
+
+
+def test_truncate_cuts_at_word_boundary():
+    assert truncate("alpha beta gamma delta", 3) == "alpha beta"
+    assert truncate("x" * 100, 2) == "x" * 7
+
+
+def test_stripped_text_keeps_company_suffix():
+    text = "Shares of Acme Pharmaceuticals  Inc    NASDAQ  ACME  rose 5% on Monday"
+    assert [sentence for _, sentence in split_article(text)] == [text]
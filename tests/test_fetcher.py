@@ -0,0 +1,125 @@
+import os
+import threading
+import time
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from scripts.fetcher import ArticleFetcher
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+ETAG = '"article-v1"'
+
+
+class FixturePages:
+    """
+    Serves tests/fixtures pages with an ETag, recording response statuses
+    """
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.statuses = []
+        self.lock = threading.Lock()
+
+    def respond(self, status):
+        # Recorded before the response is sent, so the client never sees it first
+        with self.lock:
+            self.statuses.append(status)
+
+    def handle(self, request):
+        time.sleep(self.delay)
+        name = os.path.basename(request.path.split("?")[0])
+        path = os.path.join(FIXTURES, name)
+        if not os.path.exists(path):
+            self.respond(404)
+            request.send_error(404)
+            return
+        if request.headers.get("If-None-Match") == ETAG:
+            self.respond(304)
+            request.send_response(304)
+            request.end_headers()
+            return
+        with open(path, "rb") as f:
+            body = f.read()
+        self.respond(200)
+        request.send_response(200)
+        request.send_header("Content-Type", "text/html; charset=utf-8")
+        request.send_header("Content-Length", str(len(body)))
+        request.send_header("ETag", ETAG)
+        request.end_headers()
+        request.wfile.write(body)
+
+
+@pytest.fixture
+def fixture_server(local_server):
+    pages = FixturePages()
+    server = local_server(pages.handle)
+    pages.url, pages.server = server.url, server
+    return pages
+
+
+def test_fetch_many_parses_pages_and_skips_errors(fixture_server, tmp_path):
+    article = f"{fixture_server.url}/article.html"
+    missing = f"{fixture_server.url}/missing.html"
+
+    with ArticleFetcher(cache_dir=str(tmp_path), parse_workers=0) as fetcher:
+        texts = fetcher.fetch_many([article, missing, article])
+
+    assert list(texts) == [article, missing]
+    assert texts[article].startswith("Tesla Inc. (NASDAQ: TSLA) shares rose 7%")
+    assert texts[missing] is None
+    assert sorted(fixture_server.statuses) == [200, 404]
+
+
+def test_cached_page_is_revalidated(fixture_server, tmp_path):
+    article = f"{fixture_server.url}/article.html"
+
+    with ArticleFetcher(cache_dir=str(tmp_path), parse_workers=0) as fetcher:
+        first = fetcher.fetch_html(article)
+        second = fetcher.fetch_html(article)
+
+    assert first == second
+    assert fixture_server.statuses == [200, 304]
+
+
+def test_per_host_limit(fixture_server):
+    fixture_server.delay = 0.1
+    urls = [f"{fixture_server.url}/article.html?{i}" for i in range(8)]
+
+    with ArticleFetcher(
+        cache_dir=None, max_workers=8, per_host_limit=2, parse_workers=0
+    ) as fetcher:
+        texts = fetcher.fetch_many(urls)
+
+    assert all(text for text in texts.values())
+    assert fixture_server.server.max_active == 2
+
+
+def test_parse_pool_is_reused(fixture_server):
+    article = f"{fixture_server.url}/article.html"
+
+    fetcher = ArticleFetcher(cache_dir=None, parse_workers=1)
+    try:
+        first = fetcher.fetch_many([article])
+        pool = fetcher._parse_pool
+        second = fetcher.fetch_many([article])
+        assert fetcher._parse_pool is pool
+        assert first == second
+    finally:
+        fetcher.close()
+    assert fetcher._parse_pool is None
+
+
+def test_broken_parse_pool_is_replaced(fixture_server):
+    article = f"{fixture_server.url}/article.html"
+
+    with ArticleFetcher(cache_dir=None, parse_workers=1) as fetcher:
+        broken = fetcher._get_parse_pool()
+        # A worker dying (e.g. OOM-killed) breaks the whole pool
+        with pytest.raises(BrokenProcessPool):
+            broken.submit(os._exit, 1).result()
+        assert fetcher.fetch_many([article]) == {article: None}
+        texts = fetcher.fetch_many([article])
+
+        assert fetcher._parse_pool is not broken
+    assert texts[article].startswith("Tesla Inc.")
@@ -0,0 +1,76 @@
+import threading
+import time
+
+import pytest
+
+from scripts.model_pool import ModelPool
+
+
+@pytest.fixture
+def paths(tmp_path):
+    files = []
+    for name in ("a.gguf", "b.gguf", "c.gguf"):
+        path = tmp_path / name
+        path.write_bytes(b"x" * 1024)
+        files.append(str(path))
+    return files
+
+
+def names(pool):
+    return [entry["model"] for entry in pool.stats()]
+
+
+def test_least_recently_used_model_is_evicted(paths):
+    pool = ModelPool(max_models=2, factory=lambda path: object())
+    pool.get(paths[0])
+    pool.get(paths[1])
+    pool.get(paths[0])
+    pool.get(paths[2])
+
+    assert names(pool) == ["a.gguf", "c.gguf"]
+    assert pool.evictions == 1
+
+
+def test_leased_model_is_kept_until_released(paths):
+    pool = ModelPool(max_models=1, factory=lambda path: object())
+    lease = pool.acquire(paths[0])
+    pool.get(paths[1])
+
+    assert names(pool) == ["a.gguf", "b.gguf"]
+    assert pool.evict(paths[0]) is False
+
+    lease.release()
+    lease.release()
+    assert names(pool) == ["b.gguf"]
+
+
+def test_lease_pairs_model_and_lock(paths):
+    pool = ModelPool(max_models=1, factory=lambda path: object())
+    with pool.acquire(paths[0]) as lease, pool.acquire(paths[0]) as other:
+        assert lease.model is other.model is pool.get(paths[0])
+        assert lease.lock is other.lock
+    assert pool.evict(paths[0]) is True
+
+
+def test_concurrent_requests_load_once(paths):
+    loads = []
+
+    def factory(path):
+        loads.append(path)
+        time.sleep(0.2)
+        return object()
+
+    pool = ModelPool(factory=factory)
+    pool.get(paths[0])
+    threads = [threading.Thread(target=pool.get, args=(paths[1],)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    # A hit is not blocked by the load of another model
+    start = time.perf_counter()
+    pool.get(paths[0])
+    assert time.perf_counter() - start < 0.1
+    for thread in threads:
+        thread.join()
+
+    assert loads == paths[:2]
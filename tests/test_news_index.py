@@ -0,0 +1,115 @@
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from scripts import load_news
+from scripts.news_index import NewsIndex
+
+LONG = "x" * load_news.MIN_ARTICLE_LENGTH
+
+
+def test_links_and_normalized_contents(tmp_path):
+    index = NewsIndex(str(tmp_path / "index.sqlite"))
+    index.add([("https://a/1", "Tesla  shares\nrose"), ("https://a/2", None)])
+
+    assert index.has_link("https://a/2")
+    assert not index.has_link("https://a/3")
+    assert index.has_content("Tesla shares rose")
+    assert not index.has_content("Tesla shares fell")
+    index.close()
+
+
+def test_watermark_only_moves_forward(tmp_path):
+    path = str(tmp_path / "index.sqlite")
+    index = NewsIndex(path)
+    index.set_watermark("TSLA", "2025-06-02 10:00:00")
+    index.set_watermark("TSLA", "2025-06-01 10:00:00")
+    index.close()
+
+    index = NewsIndex(path)
+    assert index.watermark("TSLA") == "2025-06-02 10:00:00"
+    assert index.watermark("AAPL") is None
+    index.close()
+
+
+class FakeFetcher:
+    def __init__(self, texts):
+        self.texts = texts
+
+    def fetch_many(self, urls):
+        return {url: self.texts.get(url) for url in urls}
+
+
+def entry(link, published):
+    return SimpleNamespace(link=link, summary=f"summary of {link}"), published
+
+
+@pytest.fixture
+def feeds(monkeypatch):
+    feeds = {}
+
+    def parse_feed(symbol, start=None, end=None):
+        entries = feeds.get(symbol, [])
+        if start:
+            entries = [e for e in entries if e[1] >= pd.Timestamp(start)]
+        return entries
+
+    monkeypatch.setattr(load_news, "parse_feed", parse_feed)
+    return feeds
+
+
+def ingest(tmp_path, tickers, texts):
+    return load_news.ingest_tickers(
+        tickers,
+        output_dir=str(tmp_path),
+        index_path=str(tmp_path / "index.sqlite"),
+        fetcher=FakeFetcher(texts),
+    )
+
+
+def test_ingest_skips_seen_links_and_syndicated_copies(tmp_path, feeds):
+    day = pd.Timestamp("2025-06-02 10:00:00").to_pydatetime()
+    feeds["TSLA"] = [entry("https://a/1", day), entry("https://b/1", day)]
+    feeds["AAPL"] = [entry("https://a/1", day), entry("https://a/2", day)]
+    texts = {
+        "https://a/1": "Tesla " + LONG,
+        # Same story under another link
+        "https://b/1": "Tesla  " + LONG,
+        "https://a/2": "Apple " + LONG,
+    }
+
+    assert ingest(tmp_path, ["TSLA", "AAPL"], texts) == {"TSLA": 1, "AAPL": 1}
+    # Nothing new on the second run
+    assert ingest(tmp_path, ["TSLA", "AAPL"], texts) == {"TSLA": 0, "AAPL": 0}
+    assert len(pd.read_csv(tmp_path / "yahoo_news_tsla.csv")) == 1
+
+
+def test_ticker_case_shares_one_watermark(tmp_path, feeds):
+    day = pd.Timestamp("2025-06-02 10:00:00").to_pydatetime()
+    feeds["AAPL"] = [entry("https://a/2", day)]
+
+    assert ingest(tmp_path, ["AAPL", "aapl"], {}) == {"AAPL": 1}
+    assert ingest(tmp_path, ["aapl"], {}) == {"AAPL": 0}
+    index = NewsIndex(str(tmp_path / "index.sqlite"))
+    assert index.watermarks() == {"AAPL": "2025-06-02 10:00:00"}
+    index.close()
+    assert len(pd.read_csv(tmp_path / "yahoo_news_aapl.csv")) == 1
+
+
+def test_existing_csv_history_seeds_the_index(tmp_path, feeds):
+    pd.DataFrame(
+        {
+            "source": ["a"],
+            "link": ["https://a/1"],
+            "extracted_text": ["Tesla " + LONG],
+            "published": ["2025-06-01 09:00:00"],
+        }
+    ).to_csv(tmp_path / "yahoo_news_tsla.csv", index=False)
+    day = pd.Timestamp("2025-06-02 10:00:00").to_pydatetime()
+    feeds["TSLA"] = [entry("https://a/1", day), entry("https://b/1", day)]
+
+    stored = ingest(tmp_path, ["TSLA"], {"https://b/1": "Tesla " + LONG})
+
+    assert stored == {"TSLA": 0}
+    assert len(pd.read_csv(tmp_path / "yahoo_news_tsla.csv")) == 1
@@ -0,0 +1,81 @@
+import json
+
+import pandas as pd
+
+from scripts.pipeline import JsonlCheckpoint, export_csv, iter_articles
+
+
+def write_dataset(path, n=5):
+    articles = [f"article {i}" for i in range(n)]
+    articles[3] = None
+    pd.DataFrame({"id": [f"id{i}" for i in range(n)], "article": articles}).to_csv(
+        path, index=False
+    )
+
+
+def test_truncated_last_line_is_ignored_and_not_extended(tmp_path):
+    path = tmp_path / "out.jsonl"
+    path.write_text(
+        json.dumps({"key": "0", "prediction": "a"}) + '\n{"key": "1", "predic'
+    )
+
+    checkpoint = JsonlCheckpoint(str(path))
+    assert checkpoint.done_keys() == {"0"}
+
+    with checkpoint:
+        checkpoint.append("1", {"prediction": "b"})
+    assert [key for _, key, _ in checkpoint.scan()] == ["0", "1"]
+
+
+def test_undecodable_lines_are_skipped(tmp_path):
+    path = tmp_path / "out.jsonl"
+    path.write_bytes(b'{"key": "0"}\n\xff\xfe garbage\n[1, 2]\n{"no_key": 1}\n')
+
+    assert JsonlCheckpoint(str(path)).done_keys() == {"0"}
+
+
+def test_resume_skips_done_keys(tmp_path):
+    dataset = tmp_path / "dataset.csv"
+    write_dataset(dataset)
+    with JsonlCheckpoint(str(tmp_path / "out.jsonl")) as checkpoint:
+        checkpoint.append("0", {"prediction": "p0"})
+        checkpoint.append("2", {"prediction": "p2"})
+        done = checkpoint.done_keys()
+
+    # Row 3 has no article
+    assert list(iter_articles(str(dataset), chunksize=2, skip_keys=done)) == [
+        ("1", "article 1"),
+        ("4", "article 4"),
+    ]
+    assert [key for key, _ in iter_articles(str(dataset), key_column="id")] == [
+        "id0",
+        "id1",
+        "id2",
+        "id4",
+    ]
+
+
+def test_export_csv_joins_latest_records_in_chunks(tmp_path):
+    dataset, output = tmp_path / "dataset.csv", tmp_path / "output.csv"
+    write_dataset(dataset)
+    with JsonlCheckpoint(str(tmp_path / "out.jsonl")) as checkpoint:
+        checkpoint.append("4", {"prediction": "p4"})
+        checkpoint.append("0", {"prediction": "old"})
+        checkpoint.append("0", {"prediction": "p0", "reasoning": "r0"})
+
+    export_csv(str(dataset), checkpoint.path, str(output), chunksize=2)
+
+    df = pd.read_csv(output)
+    assert list(df.columns) == ["id", "article", "prediction", "reasoning"]
+    assert df["prediction"].tolist()[0] == "p0"
+    assert df["prediction"].isna().tolist() == [False, True, True, True, False]
+    assert df["reasoning"].tolist()[0] == "r0"
+
+
+def test_export_csv_without_checkpoint(tmp_path):
+    dataset, output = tmp_path / "dataset.csv", tmp_path / "output.csv"
+    write_dataset(dataset)
+
+    export_csv(str(dataset), str(tmp_path / "missing.jsonl"), str(output))
+
+    pd.testing.assert_frame_equal(pd.read_csv(output), pd.read_csv(dataset))
@@ -0,0 +1,85 @@
+import queue
+import threading
+
+import pytest
+
+pytest.importorskip("fastapi")
+from fastapi.testclient import TestClient  # noqa: E402
+
+from scripts.server import JobCancelled, SlotPool, create_app  # noqa: E402
+
+
+class EchoPool:
+    """
+    Answers every job with its formatted system prompt, like a slot would
+    """
+
+    def submit(self, job):
+        job.push(job.system_prompt.format(think_mode="", few_shot_examples=""))
+        job.push(None)
+
+    def stats(self):
+        return {"queue_depth": 0, "active": 0}
+
+
+def complete(client, system_prompt):
+    return client.post(
+        "/v1/chat/completions",
+        json={
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": "Tesla {shares} rose"},
+            ]
+        },
+    )
+
+
+def test_system_prompt_braces():
+    client = TestClient(create_app(EchoPool(), "mock"))
+
+    plain = complete(client, "Answer in JSON like {}")
+    assert plain.status_code == 200
+    assert plain.json()["choices"][0]["message"]["content"] == "Answer in JSON like {}"
+
+    template = complete(client, "{think_mode} Answer in JSON like {}")
+    assert template.status_code == 400
+    assert complete(client, "{think_mode} Answer in JSON like {{}}").status_code == 200
+
+    missing = client.post("/v1/chat/completions", json={"messages": []})
+    assert missing.status_code == 400
+
+
+class ChunkModel:
+    def __init__(self, cancelled):
+        self.cancelled = cancelled
+        self.calls = 0
+
+    def run(self, system_prompt, chunk, stream=False):
+        self.calls += 1
+        # The client goes away while the first chunk is summarized
+        self.cancelled.set()
+        return f"notes of {chunk}"
+
+
+def test_map_chunks_stops_when_cancelled():
+    pool = SlotPool.__new__(SlotPool)
+    pool.chunks = queue.Queue()
+    cancelled = threading.Event()
+    llm = ChunkModel(cancelled)
+
+    with pytest.raises(JobCancelled):
+        pool.map_chunks(llm, ["a", "b", "c"], cancelled)
+
+    assert llm.calls == 1
+    # Chunks left in the queue are skipped by the other slots
+    while not pool.chunks.empty():
+        SlotPool._run_chunk(llm, *pool.chunks.get_nowait())
+    assert llm.calls == 1
+
+
+def test_map_chunks_in_order():
+    pool = SlotPool.__new__(SlotPool)
+    pool.chunks = queue.Queue()
+    llm = ChunkModel(threading.Event())
+
+    assert pool.map_chunks(llm, ["a", "b"]) == ["notes of a", "notes of b"]
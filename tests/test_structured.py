@@ -0,0 +1,76 @@
+import pytest
+
+from scripts.structured import (
+    CHARS_PER_TOKEN,
+    DEFAULT_BUDGETS,
+    NewsSummary,
+    build_grammar,
+    token_limit,
+)
+
+SUMMARY = NewsSummary(
+    headline="Tesla shares jump 7% on revenue beat",
+    core_essence="Quarterly revenue rose to $25.2 billion, above estimates.",
+    event="Tesla reported third-quarter results.",
+    financial_metrics="Revenue $25.2B vs $23.4B a year earlier.",
+    market_reaction="Shares rose 7% in after-hours trading.",
+    key_quote="Demand remained strong, the CFO said.",
+    outlook="Deliveries guidance was reaffirmed.",
+)
+
+
+def test_text_round_trip():
+    text = SUMMARY.to_text()
+
+    assert text.splitlines()[2] == "Key Points:"
+    assert NewsSummary.from_text(text).to_dict() == SUMMARY.to_dict()
+
+
+def test_from_text_tolerates_free_form_output():
+    text = (
+        "<think>\nLook for the numbers first.\n</think>\n"
+        "**Headline:** Tesla shares jump\n"
+        "**Core Essence (1-2 sentences):** Revenue beat estimates.\n"
+        "**Key Points:**\n"
+        "* **Financial Metrics:** Revenue $25.2B\n"
+        "- Outlook/Next Steps: Guidance reaffirmed\n"
+    )
+    summary = NewsSummary.from_text(text)
+
+    assert summary.reasoning == "Look for the numbers first."
+    assert summary.headline == "Tesla shares jump"
+    assert summary.core_essence == "Revenue beat estimates."
+    assert summary.financial_metrics == "Revenue $25.2B"
+    assert summary.outlook == "Guidance reaffirmed"
+    assert summary.event == ""
+
+
+def test_from_text_requires_headline_and_core_essence():
+    with pytest.raises(ValueError):
+        NewsSummary.from_text("Key Points:\n- The Event: nothing")
+
+
+def test_grammar_bounds_every_field():
+    grammar = build_grammar({"headline": 10})
+    rules = dict(line.split(" ::= ", 1) for line in grammar.splitlines())
+
+    assert rules["root"] == (
+        "think headline core-essence key-points event financial-metrics "
+        "market-reaction key-quote outlook"
+    )
+    assert rules["headline"] == (
+        f'"Headline: " [^\\n] [^\\n]{{0,{10 * CHARS_PER_TOKEN - 1}}} "\\n"'
+    )
+    limit = DEFAULT_BUDGETS["outlook"] * CHARS_PER_TOKEN - 1
+    assert (
+        rules["outlook"] == f'"- Outlook/Next Steps: " [^\\n] [^\\n]{{0,{limit}}} "\\n"'
+    )
+    assert "[^<]" not in rules["think"]
+    assert "[^<]{0,2048}" in build_grammar(thinking=True)
+    assert token_limit(thinking=True) > token_limit()
+
+
+def test_grammar_compiles():
+    llama_cpp = pytest.importorskip("llama_cpp")
+
+    llama_cpp.LlamaGrammar.from_string(build_grammar(thinking=True), verbose=False)
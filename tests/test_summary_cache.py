@@ -0,0 +1,58 @@
+import pytest
+
+from scripts import summary_cache
+from scripts.summary_cache import SummaryCache, make_key
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(summary_cache.time, "time", clock)
+    return clock
+
+
+def test_key_ignores_whitespace_only():
+    key = make_key("Tesla  shares\nrose", "model", "prompt", "/no_think", {"t": 0.6})
+
+    assert key == make_key(
+        "Tesla shares rose", "model", "prompt", "/no_think", {"t": 0.6}
+    )
+    assert key != make_key("Tesla shares rose", "model", "prompt", "/think", {"t": 0.6})
+    assert key != make_key("Tesla shares rose", "model", "prompt", "/no_think", {})
+
+
+def test_entries_are_shared_through_sqlite(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    SummaryCache(path).put("a", "summary")
+
+    other = SummaryCache(path)
+    assert other.get("a") == "summary"
+    assert other.get("b") is None
+    assert other.stats()["hits"] == 1
+    assert other.stats()["misses"] == 1
+
+
+def test_least_recently_accessed_entries_are_evicted(tmp_path, clock):
+    cache = SummaryCache(str(tmp_path / "cache.sqlite"), max_bytes=250)
+    for key in "ab":
+        cache.put(key, key * 100)
+        clock.now += 1
+    # A memory hit after TOUCH_INTERVAL refreshes the access time on disk
+    clock.now += summary_cache.TOUCH_INTERVAL + 1
+    assert cache.get("a") == "a" * 100
+
+    cache.put("c", "c" * 100)
+
+    disk = SummaryCache(cache.path)
+    assert disk.get("a") == "a" * 100
+    assert disk.get("b") is None
+    assert disk.get("c") == "c" * 100
+    assert disk.stats()["bytes"] <= 250
@@ -0,0 +1,38 @@
+from scripts.text_utils import chunk_text, strip_think
+
+
+def count_words(text):
+    return len(text.split())
+
+
+def test_short_text_is_one_chunk():
+    assert chunk_text("One paragraph.\n\nAnother one.", count_words, 100) == [
+        "One paragraph.\n\nAnother one."
+    ]
+
+
+def test_chunks_cut_at_paragraphs_within_budget():
+    paragraphs = [" ".join(f"p{i}w{j}" for j in range(6)) + "." for i in range(5)]
+    chunks = chunk_text("\n\n".join(paragraphs), count_words, 14)
+
+    assert chunks == [
+        "\n\n".join(paragraphs[0:2]),
+        "\n\n".join(paragraphs[2:4]),
+        paragraphs[4],
+    ]
+
+
+def test_long_paragraph_is_cut_at_sentences_then_words():
+    sentences = ["Short sentence here.", "Long " + " ".join(["word"] * 24) + "."]
+    text = "Intro.\n\n" + " ".join(sentences)
+    chunks = chunk_text(text, count_words, 10)
+
+    assert all(count_words(chunk) <= 10 for chunk in chunks)
+    assert chunks[0] == "Intro.\n\nShort sentence here."
+    # Nothing is lost or reordered
+    assert " ".join(chunks).split() == text.split()
+
+
+def test_strip_think():
+    assert strip_think("<think>plan</think>\nHeadline") == "Headline"
+    assert strip_think("Headline <think>unfinished") == "Headline"